@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+
+# Python imports
+import os
+import sys
+import json
+import time
+import queue
+import platform
+import multiprocessing
+from argparse import ArgumentParser
+
+# local imports
+from src.HangmanGame import HangmanGame
+from src.FrequencyStrategy import FrequencyStrategy
+from src.WordSet import WordSet
+from src.MaskWordSet import MaskWordSet
+from src.NumpyWordSet import NumpyWordSet
+from src.CacheStats import CacheStats
+from src import util
+
+try:
+   import resource # not on Windows
+except ImportError:
+   resource = None
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+# bump whenever the results format changes
+VERSION = 2
+
+# engine name -> WordSet class
+ENGINES = {
+   "mask":  MaskWordSet,
+   "sets":  WordSet,
+   "numpy": NumpyWordSet,
+}
+
+# the bundled word lists, next to this script
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# workload name -> game words file. The "words" workload is a sample of it.
+WORKLOADS = {
+   "1":     os.path.join(DATA, "1.txt"),
+   "15":    os.path.join(DATA, "15.txt"),
+   "100":   os.path.join(DATA, "100.txt"),
+   "1000":  os.path.join(DATA, "1000.txt"),
+   "words": os.path.join(DATA, "words.txt"),
+}
+
+# seconds between checks that a workload's process is still going
+POLL_SEC = 1.0
+
+# percentiles reported for latencies
+PERCENTILES = (50, 90, 99, 100)
+
+# metrics compared by --compare, and whether bigger is worse
+COMPARED = {
+   "init_sec":       True,
+   "guess_p50_us":   True,
+   "guess_p99_us":   True,
+   "game_p50_us":    True,
+   "game_p99_us":    True,
+   "total_sec":      True,
+   "peak_rss_kib":   True,
+   "cache_hit_rate": False,
+}
+
+#-----------------------------------------------------------------------------
+# percentiles
+#-----------------------------------------------------------------------------
+def percentiles(samples, scale):
+   """return - dict of 'p50' etc. -> nearest-rank percentile of samples,
+   multiplied by scale"""
+
+   samples = sorted(samples)
+   retVal = {}
+   for percent in PERCENTILES:
+      if samples:
+         rank = max(int(round(percent / 100.0 * len(samples))) - 1, 0)
+         retVal["p%d" % percent] = samples[rank] * scale
+      else:
+         retVal["p%d" % percent] = None
+   return retVal
+
+
+#-----------------------------------------------------------------------------
+# peak memory
+#-----------------------------------------------------------------------------
+def peakRss():
+   """return - peak resident set size of this process so far in KiB, or None
+   if the platform can't say"""
+
+   if resource == None:
+      return None
+   peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+   if sys.platform == "darwin":
+      peak //= 1024 # bytes there, KiB everywhere else
+   return peak
+
+
+#-----------------------------------------------------------------------------
+# read game words
+#-----------------------------------------------------------------------------
+def readWords(filepath, sample=None):
+   """return - list of the words in filepath, or an evenly spaced sample of
+   them if sample is a number of words"""
+
+   with open(filepath, 'r') as wordsFile:
+      words = wordsFile.read().upper().split()
+   if sample and sample < len(words):
+      step = len(words) / float(sample)
+      words = [words[int(i * step)] for i in range(sample)]
+   return words
+
+
+#-----------------------------------------------------------------------------
+# benchmark one workload
+#-----------------------------------------------------------------------------
+def runWorkload(dictionary, words, guesses, engine, results):
+   """Plays all the words with a fresh FrequencyStrategy, timing it. Runs in
+   its own process, so the peak memory is just this workload's.
+   results - multiprocessing queue to put the results dict on, or a dict of
+   just "error" if it failed"""
+
+   try:
+      results.put(playWorkload(dictionary, words, guesses, engine))
+   except Exception as err:
+      results.put({"error": "%s: %s" % (type(err).__name__, err)})
+
+
+#-----------------------------------------------------------------------------
+# play one workload
+#-----------------------------------------------------------------------------
+def playWorkload(dictionary, words, guesses, engine):
+   """Does runWorkload()'s work.
+   return - the results dict"""
+
+   wordSetType = ENGINES[engine]
+
+   start = time.perf_counter()
+   strategy = FrequencyStrategy(dictionary, wordSetType)
+   initTime = time.perf_counter() - start
+
+   guessTimes = []
+   gameTimes = []
+   scores = []
+   start = time.perf_counter()
+   for word in words:
+      game = HangmanGame(word, guesses)
+      gameStart = time.perf_counter()
+      while game.gameStatus() == HangmanGame.KEEP_GUESSING:
+         guessStart = time.perf_counter()
+         guess = strategy.nextGuess(game)
+         guessTimes.append(time.perf_counter() - guessStart)
+         guess.makeGuess(game)
+      gameTimes.append(time.perf_counter() - gameStart)
+      scores.append(game.currentScore())
+      strategy.newGame()
+   totalTime = time.perf_counter() - start
+
+   # the strategy's own lookups, one per guess (not its root/seed ones)
+   cache = strategy.stats()["total"]
+   hits = cache[CacheStats.HITS]
+   misses = cache[CacheStats.DISK_HITS] + cache[CacheStats.MISSES]
+   result = {
+      "games":          len(words),
+      "guesses":        len(guessTimes),
+      "init_sec":       initTime,
+      "total_sec":      totalTime,
+      "cache_hits":     hits,
+      "cache_misses":   misses,
+      "cache_hit_rate": hits / float(hits + misses) if hits + misses else None,
+      "peak_rss_kib":   peakRss(),
+      "average_score":  sum(scores) / float(len(scores)) if scores else None,
+   }
+   for name, value in percentiles(guessTimes, 1e6).items():
+      result["guess_" + name + "_us"] = value
+   for name, value in percentiles(gameTimes, 1e6).items():
+      result["game_" + name + "_us"] = value
+   return result
+
+
+#-----------------------------------------------------------------------------
+# run the benchmarks
+#-----------------------------------------------------------------------------
+def bench(dictionary, workloads, guesses, engine, sample):
+   """Runs each workload in a new process.
+   return - results dict, ready for JSON
+   exception - RuntimeError if a workload fails, or its process dies"""
+
+   retVal = {
+      "version":    VERSION,
+      "python":     platform.python_version(),
+      "platform":   platform.platform(),
+      "dictionary": dictionary,
+      "guesses":    guesses,
+      "engine":     engine,
+      "sample":     sample,
+      "workloads":  {},
+   }
+
+   for name in workloads:
+      words = readWords(WORKLOADS[name], sample if name == "words" else None)
+      results = multiprocessing.Queue()
+      worker = multiprocessing.Process(target=runWorkload,
+                                       args=(dictionary, words, guesses,
+                                             engine, results))
+      worker.start()
+      result = None
+      while result == None:
+         try:
+            result = results.get(timeout=POLL_SEC)
+         except queue.Empty:
+            if not worker.is_alive() and results.empty():
+               raise RuntimeError("workload %s: process died (exit code %s)" %
+                                  (name, worker.exitcode))
+      worker.join()
+      if "error" in result:
+         raise RuntimeError("workload %s: %s" % (name, result["error"]))
+      retVal["workloads"][name] = result
+      util.DBG(name + ": " + json.dumps(result, sort_keys=True), DEBUG)
+
+   return retVal
+
+
+#-----------------------------------------------------------------------------
+# compare two runs
+#-----------------------------------------------------------------------------
+def compare(old, new, threshold):
+   """Prints old vs new for each workload in both.
+   return - list of regressions: a metric worse by more than threshold (a
+   fraction), or a different average score"""
+
+   regressions = []
+   print("%-8s %-16s %14s %14s %8s" % ("workload", "metric", "old", "new", "change"))
+   for name in sorted(set(old["workloads"]) & set(new["workloads"])):
+      before = old["workloads"][name]
+      after = new["workloads"][name]
+
+      # correctness guard: scores must not move at all
+      if before["average_score"] != after["average_score"]:
+         regressions.append("%s: average score %r -> %r" %
+                            (name, before["average_score"],
+                             after["average_score"]))
+
+      for metric, biggerIsWorse in sorted(COMPARED.items()):
+         if before.get(metric) == None or after.get(metric) == None:
+            continue
+         change = 0.0
+         if before[metric]:
+            change = (after[metric] - before[metric]) / float(before[metric])
+         flag = ""
+         if (change if biggerIsWorse else -change) > threshold:
+            flag = " !"
+            regressions.append("%s: %s %+.1f%%" % (name, metric, change * 100))
+         print("%-8s %-16s %14.3f %14.3f %+7.1f%%%s" %
+               (name, metric, before[metric], after[metric], change * 100, flag))
+
+   return regressions
+
+
+#-----------------------------------------------------------------------------
+# primary function
+#-----------------------------------------------------------------------------
+def main(argv=None):
+   """This is run when the file is evaluated, like: `python3 bench.py`.
+   Benchmarks FrequencyStrategy over the bundled data/ word lists and writes
+   the results as JSON, or compares two such results files.
+   return - 0 on success, 1 on regression, 2 on exception"""
+   if argv is None:
+      argv = sys.argv
+   try:
+      parser = ArgumentParser()
+      parser.add_argument("-d", "--dictionary",
+                          default=os.path.join(DATA, "words.txt"),
+                          help="dictionary file (or snapshot) to load "
+                          "(default: data/words.txt)")
+      parser.add_argument("-g", "--guesses", type=int, default=5,
+                          help="max number of wrong guesses")
+      parser.add_argument("--sets",
+                          action="store_true", default=False,
+                          help="use plain string-set word sets instead")
+      parser.add_argument("--numpy",
+                          action="store_true", default=False,
+                          help="use the NumPy engine (numpy must be "
+                          "installed) instead")
+      parser.add_argument("-W", "--workload", action="append",
+                          choices=sorted(WORKLOADS), dest="workloads",
+                          default=None,
+                          help="only this workload, can be repeated "
+                          "(default: all)")
+      parser.add_argument("-s", "--sample", type=int, default=2000,
+                          help="number of words to sample from words.txt "
+                          "for the 'words' workload")
+      parser.add_argument("-o", "--output", default=None,
+                          help="write results JSON to file (default: stdout)")
+      parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                          default=None,
+                          help="compare two results files instead of running")
+      parser.add_argument("--threshold", type=float, default=0.10,
+                          help="fraction a metric can get worse by before "
+                          "--compare calls it a regression")
+
+      args = parser.parse_args(argv[1:])
+      util.DBG(args, DEBUG)
+
+      if args.compare:
+         runs = []
+         for filepath in args.compare:
+            with open(filepath, 'r') as results:
+               runs.append(json.load(results))
+         regressions = compare(runs[0], runs[1], args.threshold)
+         for regression in regressions:
+            print("REGRESSION: " + regression)
+         return 1 if regressions else 0
+
+      workloads = args.workloads if args.workloads else sorted(WORKLOADS, key=len)
+      engine = "numpy" if args.numpy else "sets" if args.sets else "mask"
+      results = bench(args.dictionary, workloads, args.guesses, engine,
+                      args.sample)
+      text = json.dumps(results, indent=2, sort_keys=True)
+      if args.output:
+         with open(args.output, 'w') as out:
+            out.write(text + "\n")
+      else:
+         print(text)
+      return 0
+   except Exception as err:
+      # raise err # uncomment to get stack trace
+      print(err, file=sys.stderr)
+      print("for help use --help", file=sys.stderr)
+      return 2
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == "__main__":
+  sys.exit(main())
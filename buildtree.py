@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+# Python imports
+import sys
+from argparse import ArgumentParser
+
+# local imports
+from src.FrequencyStrategy import FrequencyStrategy
+from src.MaskWordSet import MaskWordSet
+from src.DecisionTree import DecisionTree
+from src import util
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+#-----------------------------------------------------------------------------
+# primary function
+#-----------------------------------------------------------------------------
+def main(argv=None):
+   """This is run when the file is evaluated, like: `python3 buildtree.py`.
+   Reads in the dictionary file, walks every game FrequencyStrategy could play
+   on it, and saves every guess it'd make as a DecisionTree for
+   `hangman.py --tree`.
+   return - 0 on success, non-zero on exception"""
+   if argv is None:
+      argv = sys.argv
+   try:
+      parser = ArgumentParser()
+      parser.add_argument("dictionary",
+                          help="read dictionary in from file")
+      parser.add_argument("tree",
+                          help="write decision tree out to file")
+      parser.add_argument("-g", "--guesses", type=int, default=5,
+                          help="max number of wrong guesses")
+      parser.add_argument("-l", "--length", type=int, action="append",
+                          dest="lengths", default=None,
+                          help="only this word length, can be repeated "
+                          "(default: all lengths)")
+      parser.add_argument("-t", "--time",
+                          action="store_true", default=False,
+                          help="print timing info")
+
+      args = parser.parse_args(argv[1:])
+      util.DBG(args, DEBUG)
+
+      with util.Timer() as sInit:
+         strategy = FrequencyStrategy(args.dictionary, MaskWordSet)
+
+      with util.Timer() as buildTime:
+         tree = DecisionTree(args.guesses)
+         lengths = args.lengths if args.lengths else strategy.lengths()
+         for length in lengths:
+            tree.build(strategy, strategy.table(length).words)
+         tree.save(args.tree)
+
+      print("nodes: " + str(len(tree)))
+
+      util.DBG("init time:  %09f sec" % sInit.interval, args.time)
+      util.DBG("build time: %09f sec" % buildTime.interval, args.time)
+      return 0
+   except Exception as err:
+      # raise err # uncomment to get stack trace
+      print(err, file=sys.stderr)
+      print("for help use --help", file=sys.stderr)
+      return 2
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# Python imports
+import sys
+from argparse import ArgumentParser
+
+# local imports
+from src.FrequencyStrategy import FrequencyStrategy
+from src.DictionarySnapshot import DictionarySnapshot
+from src import util
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+#-----------------------------------------------------------------------------
+# primary function
+#-----------------------------------------------------------------------------
+def main(argv=None):
+   """This is run when the file is evaluated, like: `python3 compiledict.py`.
+   Reads in the dictionary file and writes it back out as a DictionarySnapshot,
+   which hangman.py can take in place of the dictionary to start up faster.
+   return - 0 on success, non-zero on exception"""
+   if argv is None:
+      argv = sys.argv
+   try:
+      parser = ArgumentParser()
+      parser.add_argument("dictionary",
+                          help="read dictionary in from file")
+      parser.add_argument("snapshot",
+                          help="write compiled dictionary out to file")
+      parser.add_argument("-t", "--time",
+                          action="store_true", default=False,
+                          help="print timing info")
+
+      args = parser.parse_args(argv[1:])
+      util.DBG(args, DEBUG)
+
+      with util.Timer() as sInit:
+         strategy = FrequencyStrategy(args.dictionary)
+
+      with util.Timer() as writeTime:
+         DictionarySnapshot.write(strategy, args.snapshot)
+
+      util.DBG("init time:  %09f sec" % sInit.interval, args.time)
+      util.DBG("write time: %09f sec" % writeTime.interval, args.time)
+      return 0
+   except Exception as err:
+      # raise err # uncomment to get stack trace
+      print(err, file=sys.stderr)
+      print("for help use --help", file=sys.stderr)
+      return 2
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == "__main__":
+  sys.exit(main())
@@ -2,6 +2,10 @@
 
 # Python imports
 import sys
+import json
+import itertools
+import collections
+import multiprocessing
 from argparse import ArgumentParser
 
 # local imports
@@ -9,31 +13,305 @@ from src.HangmanGame import HangmanGame
 from src.GuessLetter import GuessLetter
 from src.GuessWord import GuessWord
 from src.FrequencyStrategy import FrequencyStrategy
+from src.WordSet import WordSet
+from src.MaskWordSet import MaskWordSet
+from src.NumpyWordSet import NumpyWordSet
+from src.WordCache import WordCache
+from src.CacheStats import CacheStats
+from src.StateTrace import StateTrace
+from src import strategies
+from src.TreeStrategy import TreeStrategy
+from src.DecisionTree import outcome
+from src.Profiler import profiler
 from src import util
 
 # CONSTANTS
 DEBUG  = False # true for Debug print outs
-TIMING = False # true for Timing print outs not included in args.time
+
+# Strategy for worker processes to use. Set before they're forked, so they all
+# share the parent's copy (copy-on-write) instead of loading their own.
+workerStrategy = None
+
+# words per worker per batch, when playing games on worker processes
+WORKER_BATCH = 1000
 
 #-----------------------------------------------------------------------------
 # run the game
 #-----------------------------------------------------------------------------
 def run(game, strategy, printGameState=True):
-   """Runs one game of Hangman with the supplied strategy"""
+   """Runs one game of Hangman with the supplied strategy
+   return - (score, number of guesses made)"""
 
+   numGuesses = 0
    while game.gameStatus() == HangmanGame.KEEP_GUESSING:
+      numGuesses += 1
+
       # ask strategy for a guess
-      with util.Timer() as sTime:
+      with profiler.span("nextGuess"):
          guess = strategy.nextGuess(game)
-      util.DBG("Strategy took %.09f sec." % sTime.interval, TIMING)
 
       # apply guess to game
-      guess.makeGuess(game)
+      with profiler.span("makeGuess"):
+         guess.makeGuess(game)
       
       # print game state if desired
       util.DBG(game, printGameState)
 
-   return game.currentScore()
+   return game.currentScore(), numGuesses
+
+#-----------------------------------------------------------------------------
+# play a game
+#-----------------------------------------------------------------------------
+def playGame(strategy, word, guesses, printGameState=False):
+   """Makes a game for word and runs it with the supplied strategy.
+   return - (score, seconds the game took, number of guesses made)"""
+
+   game = HangmanGame(word.upper(), guesses)
+
+   # run a game!
+   with util.Timer() as gTime, profiler.span("game"):
+      score, numGuesses = run(game, strategy, printGameState)
+
+   # reset strategy for next go
+   strategy.newGame()
+
+   return score, gTime.interval, numGuesses
+
+#-----------------------------------------------------------------------------
+# read game words
+#-----------------------------------------------------------------------------
+def readWords(gameWords):
+   """Reads game words from an open file one line at a time, so only the
+   current line is ever in memory.
+   return - generator of the words, uppercased"""
+
+   for line in gameWords:
+      for word in line.split():
+         yield word.upper()
+
+#-----------------------------------------------------------------------------
+# play games together
+#-----------------------------------------------------------------------------
+def playLockstep(strategy, words, guesses):
+   """Plays all the games at once, as a tree: games in the same state (same
+   guesses and same outcomes so far) get one guess for all of them, then split
+   up by what it shows for each. Every state is only asked about once, and
+   narrowed down from its parent state's words. Scores are the same as playing
+   the games one at a time.
+   strategy - a FrequencyStrategy
+   return - list of (score, seconds, number of guesses made) in the same order
+   as words. Games aren't timed separately, so seconds is the average."""
+
+   words = [word.upper() for word in words]
+   results = [None] * len(words)
+
+   byLength = collections.defaultdict(list)
+   for i, word in enumerate(words):
+      byLength[len(word)].append(i)
+
+   with util.Timer() as allTime, profiler.span("lockstep"):
+      for length in sorted(byLength):
+         group = byLength[length]
+         with profiler.span("table"):
+            strategy.table(length)
+
+         # depth first: (game of one of the group's words, its parent state's
+         # WordSet and cache key, indices of the words in that state, guesses
+         # made so far)
+         stack = [(HangmanGame(words[group[0]], guesses), None, None, group, 0)]
+         while stack:
+            game, previous, previousKey, group, numGuesses = stack.pop()
+
+            key = strategy.key(game)
+            if strategy.trace != None:
+               strategy.trace.record(key, len(group))
+            wordSet = strategy.wordCache.get(key) # pinned roots and seeds
+            if wordSet != None:
+               strategy.counted(key, length)
+            else:
+               strategy.cacheStats.count(CacheStats.MISSES, length)
+               with profiler.span("narrow"):
+                  wordSet = strategy.narrowed(game.getGuessedSoFar(),
+                                              game.getIncorrectlyGuessedLetters(),
+                                              previous, previousKey)
+            guess = strategy.choose(game, wordSet)
+
+            # split up by what the guess shows for each word
+            outcomes = collections.defaultdict(list)
+            for i in group:
+               outcomes[outcome(guess.guess, words[i])].append(i)
+
+            for members in outcomes.values():
+               child = game.branch(words[members[0]])
+               guess.makeGuess(child)
+               if child.gameStatus() == HangmanGame.KEEP_GUESSING:
+                  stack.append((child, wordSet, key, members,
+                                numGuesses + 1))
+               else:
+                  for i in members:
+                     results[i] = (child.currentScore(), numGuesses + 1)
+
+   seconds = allTime.interval / len(words) if words else 0.0
+   return [(score, seconds, numGuesses) for score, numGuesses in results]
+
+#-----------------------------------------------------------------------------
+# split games up for workers
+#-----------------------------------------------------------------------------
+def shardByLength(words, numShards):
+   """Splits words up into (at most) numShards shards of about the same size,
+   keeping words of the same length together where possible so each worker's
+   cache stays warm. Lengths with more than their fair share get split.
+   return - list of shards, each a list of indices into words"""
+
+   byLength = collections.defaultdict(list)
+   for i, word in enumerate(words):
+      byLength[len(word)].append(i)
+
+   # chop lengths into pieces no bigger than a fair share
+   fairShare = -(-len(words) // numShards) # ceiling
+   pieces = []
+   for length in sorted(byLength):
+      indices = byLength[length]
+      pieces.extend(indices[i:i + fairShare]
+                    for i in range(0, len(indices), fairShare))
+
+   # biggest pieces first, each to the emptiest shard
+   shards = [[] for _ in range(numShards)]
+   for piece in sorted(pieces, key=len, reverse=True):
+      min(shards, key=len).extend(piece)
+   return [shard for shard in shards if shard]
+
+#-----------------------------------------------------------------------------
+# worker process
+#-----------------------------------------------------------------------------
+def playShard(work):
+   """Plays a shard's games with workerStrategy. Runs in a worker process.
+   work - (words, guesses, printGameState)
+   return - (list of playGame() results for each word, profiler stats of the
+   shard's games, and their CacheStats and StateTrace or None)"""
+
+   words, guesses, printGameState = work
+   profiler.reset() # just this shard's, not whatever the parent had
+   cacheStats = trace = None
+   if isinstance(workerStrategy, FrequencyStrategy):
+      cacheStats = workerStrategy.cacheStats
+      cacheStats.reset()
+      trace = workerStrategy.trace
+      if trace != None:
+         trace.reset()
+   results = [playGame(workerStrategy, word, guesses, printGameState)
+              for word in words]
+   if isinstance(workerStrategy, FrequencyStrategy):
+      workerStrategy.save() # the parent only has its own cache to save
+   return results, profiler.stats, cacheStats, trace
+
+#-----------------------------------------------------------------------------
+# play games on multiple cores
+#-----------------------------------------------------------------------------
+def playParallel(strategy, words, guesses, printGameState, workers):
+   """Plays the games across worker processes forked from this one, so they
+   inherit strategy (and its dictionary and cache) without reloading it.
+   words - list, or any iterable (e.g. a readWords() generator), which is read
+   and played WORKER_BATCH words per worker at a time
+   return - generator of playGame() results in the same order as words
+   exception - ValueError if the platform can't fork processes"""
+   global workerStrategy
+
+   workerStrategy = strategy
+   context = multiprocessing.get_context("fork")
+
+   # load the dictionary words the games need before forking, so the workers
+   # share them instead of each loading their own. Streamed words could be
+   # any length.
+   if isinstance(strategy, FrequencyStrategy):
+      if isinstance(words, list):
+         strategy.preload(set(map(len, words)))
+      else:
+         strategy.preload()
+
+   words = iter(words)
+   with context.Pool(workers) as pool:
+      while True:
+         batch = list(itertools.islice(words, WORKER_BATCH * workers))
+         if not batch:
+            break
+
+         shards = shardByLength(batch, workers)
+         played = pool.map(playShard,
+                           [([batch[i] for i in shard], guesses, printGameState)
+                            for shard in shards],
+                           chunksize=1)
+
+         # put results back in batch order
+         results = [None] * len(batch)
+         for shard, (shardResults, stats, cacheStats, trace) in zip(shards,
+                                                                    played):
+            for i, result in zip(shard, shardResults):
+               results[i] = result
+            profiler.merge(stats)
+            if cacheStats != None:
+               strategy.cacheStats.merge(cacheStats)
+            if trace != None:
+               strategy.trace.merge(trace)
+         yield from results
+
+#-----------------------------------------------------------------------------
+# worker process, for comparing
+#-----------------------------------------------------------------------------
+def playStrategy(name):
+   """Plays all of compareWords with the registered strategy name, sharing
+   workerStrategy's dictionary. Runs in a worker process.
+   return - (list of scores, seconds, SpanStats of its guesses, or None if
+   there weren't any games)"""
+
+   strategy = strategies.create(name, workerStrategy.filepath,
+                                workerStrategy.wordSetType, base=workerStrategy,
+                                maxWrongGuesses=compareGuesses)
+   strategy.preload(set(map(len, compareWords)))
+
+   profiler.enabled = True
+   profiler.reset()
+   with util.Timer() as allTime:
+      scores = [playGame(strategy, word, compareGuesses)[0]
+                for word in compareWords]
+   return scores, allTime.interval, profiler.stats.get(("game", "nextGuess"))
+
+#-----------------------------------------------------------------------------
+# compare strategies
+#-----------------------------------------------------------------------------
+def compare(strategy, names, words, guesses):
+   """Plays words with each of the registered strategies names, each in its
+   own process forked from this one. They all share strategy's dictionary
+   and word tables (built before forking), so it's only loaded once, but each
+   has its own cache.
+   return - table of each one's average score and guess latency (string)
+   exception - ValueError if the platform can't fork processes"""
+   global workerStrategy, compareWords, compareGuesses
+
+   workerStrategy = strategy
+   compareWords = [word.upper() for word in words]
+   compareGuesses = guesses
+   strategy.preload(set(map(len, compareWords)))
+
+   context = multiprocessing.get_context("fork")
+   with context.Pool(len(names)) as pool:
+      played = pool.map(playStrategy, names, chunksize=1)
+
+   lines = ["%-20s %7s %9s %9s %9s %9s %9s" % ("strategy", "games", "average",
+                                               "p50 us", "p90 us", "p99 us",
+                                               "total s")]
+   for name, (scores, seconds, guessStats) in zip(names, played):
+      if not scores:
+         # no games, so nothing to average
+         lines.append("%-20s %7d %9s %9s %9s %9s %9.3f" % (
+                      name, 0, "n/a", "n/a", "n/a", "n/a", seconds))
+         continue
+      lines.append("%-20s %7d %9.4f %9.1f %9.1f %9.1f %9.3f" % (
+                   name, len(scores), sum(scores) / float(len(scores)),
+                   guessStats.percentile(50) / 1000.0,
+                   guessStats.percentile(90) / 1000.0,
+                   guessStats.percentile(99) / 1000.0, seconds))
+   return "\n".join(lines)
 
 #-----------------------------------------------------------------------------
 # primary function
@@ -51,8 +329,14 @@ def main(argv=None):
                           help="read dictionary in from file")
 #      parser.add_argument("words",
 #                          help="read game words in from file")
-      parser.add_argument("words", nargs="+", 
+      parser.add_argument("words", nargs="*", 
                           help="list of words to play hangman on")
+      parser.add_argument("-f", "--words-file", default=None,
+                          help="also read game words from file ('-' for "
+                          "stdin), as they're played")
+      parser.add_argument("--jsonl", default=None,
+                          help="write each game's result as a JSON line to "
+                          "file ('-' for stdout) as soon as it's played")
       parser.add_argument("-g", "--guesses", type=int, default=5,
                           help="max number of wrong guesses")
       parser.add_argument("-v", "--verbose", 
@@ -63,47 +347,203 @@ def main(argv=None):
                           action="store_true", default=False,
                           #action="count", default=0,
                           help="print timing info")
+      parser.add_argument("--sets",
+                          action="store_true", default=False,
+                          help="use plain string-set word sets instead")
+      parser.add_argument("--numpy",
+                          action="store_true", default=False,
+                          help="use the NumPy engine (numpy must be "
+                          "installed) instead")
+      parser.add_argument("--cache", choices=WordCache.POLICIES, default=None,
+                          help="cache eviction policy (default: lru if there's "
+                          "a cache budget, else unbounded)")
+      parser.add_argument("--cache-entries", type=int, default=None,
+                          help="max number of cached game states")
+      parser.add_argument("--cache-bytes", type=util.parse_size, default=None,
+                          help="max approximate memory of cached game states "
+                          "(e.g. 200M)")
+      parser.add_argument("--disk-cache", default=None,
+                          help="keep a second tier of cached game states in "
+                          "this file, to start warm from next run")
+      parser.add_argument("--strategy", default="frequency",
+                          choices=sorted(strategies.STRATEGIES),
+                          help="registered strategy to guess with")
+      parser.add_argument("--entropy",
+                          action="store_true", default=False,
+                          help="pick letters by information gain instead of "
+                          "by frequency (same as --strategy entropy)")
+      parser.add_argument("--compare", default=None,
+                          help="play the words with each of these registered "
+                          "strategies (comma separated, or 'all'), in "
+                          "parallel, and print their scores and guess "
+                          "latencies side by side")
+      parser.add_argument("--tree", default=None,
+                          help="guess from a decision tree compiled by "
+                          "buildtree.py instead (dictionary isn't loaded)")
+      parser.add_argument("-w", "--workers", type=int, default=1,
+                          help="number of worker processes to play games on "
+                          "(-vv game states print as they're played)")
+      parser.add_argument("--lockstep",
+                          action="store_true", default=False,
+                          help="play all the games together, once per shared "
+                          "game state (words are read in first; no -vv)")
+      parser.add_argument("-p", "--profile",
+                          action="store_true", default=False,
+                          help="time where each guess goes, and print a "
+                          "table of the timed spans at exit")
+      parser.add_argument("--profile-json", default=None,
+                          help="same, but write the spans (with histograms) "
+                          "as JSON to file")
+      parser.add_argument("--stats",
+                          action="store_true", default=False,
+                          help="print the cache's hits, misses and memory per "
+                          "word length at exit (with --workers, the counts are "
+                          "all the workers', the memory just this process's)")
+      parser.add_argument("--stats-every", type=int, default=None,
+                          metavar="N",
+                          help="also print a one line summary of them to "
+                          "stderr every N games")
+      parser.add_argument("--trace", default=None,
+                          help="count the game states the games get to, and "
+                          "add them to the counts in this file at exit")
+      parser.add_argument("--warm", default=None,
+                          help="before playing, pin the most common game "
+                          "states in this --trace file into the cache")
+      parser.add_argument("--warm-top", type=int, default=1000, metavar="N",
+                          help="how many of them (default 1000)")
+      parser.add_argument("--warm-background",
+                          action="store_true", default=False,
+                          help="look them up on a thread while the first "
+                          "games play, instead of first")
 
       args = parser.parse_args()
       util.DBG(args, DEBUG)
+      profiler.enabled = args.profile or args.profile_json != None
+      if not args.words and args.words_file == None:
+         parser.error("no game words (give some, or --words-file)")
+      if args.lockstep and (args.tree or args.workers > 1):
+         parser.error("--lockstep can't be used with --tree or --workers")
+      names = None
+      if args.compare != None:
+         if args.tree or args.lockstep or args.workers > 1:
+            parser.error("--compare can't be used with --tree, --lockstep or "
+                         "--workers")
+         names = args.compare.split(",")
+         if args.compare == "all":
+            names = sorted(strategies.STRATEGIES)
+         for name in names:
+            if name not in strategies.STRATEGIES:
+               parser.error("no strategy called %r (choose from %s)" %
+                            (name, ", ".join(sorted(strategies.STRATEGIES))))
+      if (args.stats or args.stats_every or args.trace or args.warm) and \
+         (args.tree or names != None):
+         parser.error("--stats, --trace and --warm can't be used with --tree "
+                      "or --compare")
+      if args.warm_background and (args.lockstep or args.workers > 1):
+         parser.error("--warm-background can't be used with --lockstep or "
+                      "--workers")
+      if args.stats_every != None and args.stats_every < 1:
+         parser.error("--stats-every must be at least 1")
 
-      # determine if we're using a list or a word file
-      # (testing is easier with a file, but requirements are for a list)
-      words = []
-      if isinstance(args.words, str):
-         # read in words to run games on
-         with open(args.words, 'r') as gameWords:
-           # read words file into set
-           words = [word.strip().upper() for word in gameWords if word.strip() != ""]
-      else:
-         words = args.words
+      # The words on the command line, then the words file's streamed in, so
+      # a file of any size plays in constant memory.
+      words = args.words
+      gameWords = None
+      if args.words_file != None:
+         if args.words_file == "-":
+            gameWords = sys.stdin
+         else:
+            gameWords = open(args.words_file, 'r')
+         words = itertools.chain(words, readWords(gameWords))
+
+      jsonl = None
+      if args.jsonl == "-":
+         jsonl = sys.stdout
+      elif args.jsonl != None:
+         jsonl = open(args.jsonl, 'w')
 
-      with util.Timer() as sInit:
+      with util.Timer() as sInit, profiler.span("init"):
          # stuff that can be reused between games
-         strategy = FrequencyStrategy(args.dictionary)
+         wordSetType = WordSet if args.sets else MaskWordSet
+         if args.numpy:
+            wordSetType = NumpyWordSet
+         policy = args.cache
+         if policy == None:
+            if args.cache_entries != None or args.cache_bytes != None:
+               policy = WordCache.LRU
+            else:
+               policy = WordCache.UNBOUNDED
+         wordCache = WordCache(policy, args.cache_entries, args.cache_bytes)
+         if args.tree:
+            strategy = TreeStrategy(args.tree)
+         else:
+            strategy = strategies.create(
+               "entropy" if args.entropy else args.strategy,
+               args.dictionary, wordSetType, wordCache, args.disk_cache,
+               maxWrongGuesses=args.guesses)
+            if args.warm != None:
+               warm = StateTrace()
+               warm.load(args.warm)
+               strategy.warm(warm.top(args.warm_top), args.warm_background)
+            if args.trace != None:
+               strategy.trace = StateTrace(args.trace)
          avg = 0.0
-         avgTime = 0.0
+         totalScore = 0
+         numGames = 0
+         gameTimes = 0.0
+
+      if names != None:
+         print(compare(strategy, names, list(words), args.guesses))
+         util.DBG("init time:         %09f sec" % sInit.interval, args.time)
+         return 0
 
       with util.Timer() as totalTime:
-         for word in words:
-            # make per-game stuff
-            word = word.upper()
-            game = HangmanGame(word, args.guesses)
-           
-            # run a game!
-            with util.Timer() as gTime:
-               run(game, strategy, args.verbose > 1)
-            util.DBG("Game took %.09f sec." % gTime.interval, TIMING)
-            avgTime += gTime.interval / float(len(words))
+         # tee, so the results can be matched back up with their words
+         # without holding on to the words (results are in order)
+         words, played = itertools.tee(words)
+         if args.lockstep:
+            results = playLockstep(strategy, list(played), args.guesses)
+         elif args.workers > 1:
+            results = playParallel(strategy, played, args.guesses,
+                                   args.verbose > 1, args.workers)
+         else:
+            results = (playGame(strategy, word, args.guesses, args.verbose > 1)
+                       for word in played)
+
+         for word, (score, gameTime, numGuesses) in zip(words, results):
+            numGames += 1
+            gameTimes += gameTime
 
             # average score update
-            avg += game.currentScore() / float(len(words))
+            totalScore += score
+            if gameWords == None:
+               avg += score / float(len(args.words))
+            else:
+               avg = totalScore / float(numGames)
 
             if args.verbose:
-               print(word + " = " + str(game.currentScore()))
-           
-            # reset strategy for next go
-            strategy.newGame()
+               print(word.upper() + " = " + str(score))
+            if jsonl != None:
+               jsonl.write(json.dumps({"word": word.upper(), "score": score,
+                                       "guesses": numGuesses,
+                                       "seconds": gameTime,
+                                       "average": totalScore / float(numGames)})
+                           + "\n")
+               jsonl.flush()
+            if args.stats_every and numGames % args.stats_every == 0:
+               print("%d games: %s" % (numGames,
+                                       CacheStats.summary(strategy.stats())),
+                     file=sys.stderr)
+
+      if isinstance(strategy, FrequencyStrategy):
+         strategy.save()
+         if strategy.trace != None:
+            strategy.trace.save()
+      if gameWords not in (None, sys.stdin):
+         gameWords.close()
+      if jsonl not in (None, sys.stdout):
+         jsonl.close()
+      avgTime = gameTimes / numGames if numGames else 0.0
 
       print("average score: " + str(avg))
 
@@ -112,6 +552,14 @@ def main(argv=None):
       util.DBG("total game time:   %09f sec" % totalTime.interval, args.time)
       util.DBG("total time:        %09f sec" % (sInit.interval + totalTime.interval),
                args.time)
+
+      if args.stats:
+         print(CacheStats.table(strategy.stats()))
+      if args.profile:
+         print(profiler.table())
+      if args.profile_json:
+         with open(args.profile_json, 'w') as out:
+            out.write(profiler.json() + "\n")
       return 0
    except Exception as err:
       # raise err # uncomment to get stack trace
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+# Python imports
+import sys
+import asyncio
+from argparse import ArgumentParser
+
+# local imports
+from src.FrequencyStrategy import FrequencyStrategy
+from src.WordSet import WordSet
+from src.MaskWordSet import MaskWordSet
+from src.WordCache import WordCache
+from src.HangmanServer import HangmanServer
+from src.StateTrace import StateTrace
+from src import util
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+#-----------------------------------------------------------------------------
+# primary function
+#-----------------------------------------------------------------------------
+def main(argv=None):
+   """This is run when the file is evaluated, like: `python3 server.py`.
+   Reads in the dictionary file once, then hosts Hangman games for clients
+   over TCP on localhost until killed (see HangmanServer for the protocol).
+   return - 0 on success, non-zero on exception"""
+   if argv is None:
+      argv = sys.argv
+   try:
+      parser = ArgumentParser()
+      parser.add_argument("dictionary",
+                          help="read dictionary in from file (or snapshot)")
+      parser.add_argument("--host", default="127.0.0.1",
+                          help="address to listen on")
+      parser.add_argument("--port", type=int, default=8047,
+                          help="port to listen on")
+      parser.add_argument("--sets",
+                          action="store_true", default=False,
+                          help="use plain string-set word sets instead")
+      parser.add_argument("--cache", choices=WordCache.POLICIES, default=None,
+                          help="cache eviction policy (default: lru if there's "
+                          "a cache budget, else unbounded)")
+      parser.add_argument("--cache-entries", type=int, default=None,
+                          help="max number of cached game states")
+      parser.add_argument("--cache-bytes", type=util.parse_size, default=None,
+                          help="max approximate memory of cached game states "
+                          "(e.g. 200M)")
+      parser.add_argument("--preload",
+                          action="store_true", default=False,
+                          help="build every word length's table up front "
+                          "instead of on its first game")
+      parser.add_argument("--trace", default=None,
+                          help="count the game states games get to, and add "
+                          "them to the counts in this file when stopped")
+      parser.add_argument("--warm", default=None,
+                          help="pin the most common game states in this "
+                          "--trace file into the cache at startup")
+      parser.add_argument("--warm-top", type=int, default=1000, metavar="N",
+                          help="how many of them (default 1000)")
+      parser.add_argument("--warm-background",
+                          action="store_true", default=False,
+                          help="look them up on a thread while serving, "
+                          "instead of before")
+
+      args = parser.parse_args(argv[1:])
+      util.DBG(args, DEBUG)
+
+      wordSetType = WordSet if args.sets else MaskWordSet
+      policy = args.cache
+      if policy == None:
+         if args.cache_entries != None or args.cache_bytes != None:
+            policy = WordCache.LRU
+         else:
+            policy = WordCache.UNBOUNDED
+      wordCache = WordCache(policy, args.cache_entries, args.cache_bytes)
+      strategy = FrequencyStrategy(args.dictionary, wordSetType, wordCache)
+      if args.preload:
+         strategy.preload()
+      if args.warm != None:
+         warm = StateTrace()
+         warm.load(args.warm)
+         strategy.warm(warm.top(args.warm_top), args.warm_background)
+      if args.trace != None:
+         strategy.trace = StateTrace(args.trace)
+
+      print("serving on %s:%d" % (args.host, args.port), flush=True)
+      try:
+         asyncio.run(HangmanServer(strategy).serve(args.host, args.port))
+      finally:
+         if strategy.trace != None:
+            strategy.trace.save()
+      return 0
+   except KeyboardInterrupt:
+      return 0
+   except Exception as err:
+      # raise err # uncomment to get stack trace
+      print(err, file=sys.stderr)
+      print("for help use --help", file=sys.stderr)
+      return 2
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == "__main__":
+  sys.exit(main())
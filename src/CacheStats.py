@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import collections
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class CacheStats:
+   """Counts of how a strategy's game state lookups went, per word length:
+     - hits:       found in the WordCache
+     - seed_hits:  of those, how many were a pre-seeded miss (see
+                   FrequencyStrategy.seedCache())
+     - disk_hits:  not in the WordCache, but read back from the DiskCache
+     - misses:     in neither, so narrowed down from the dictionary's index
+     - insertions: put into the WordCache
+
+   The counts are cheap to keep. What's in the cache, and how much memory it
+   takes, is only worked out when asked for (see snapshot())."""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   HITS       = "hits"
+   SEED_HITS  = "seed_hits"
+   DISK_HITS  = "disk_hits"
+   MISSES     = "misses"
+   INSERTIONS = "insertions"
+   COUNTERS   = (HITS, SEED_HITS, DISK_HITS, MISSES, INSERTIONS)
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self):
+      """Initialize CacheStats with nothing counted"""
+
+      self.counts = {name: collections.Counter() for name in self.COUNTERS}
+
+
+   #-----------------------------------------------------------------------------
+   # count one
+   #-----------------------------------------------------------------------------
+   def count(self, name, length):
+      """Counts one of counter name (one of COUNTERS) for word length"""
+
+      self.counts[name][length] += 1
+
+
+   #-----------------------------------------------------------------------------
+   # forget
+   #-----------------------------------------------------------------------------
+   def reset(self):
+      """Drops everything counted so far"""
+
+      for counter in self.counts.values():
+         counter.clear()
+
+
+   #-----------------------------------------------------------------------------
+   # combine
+   #-----------------------------------------------------------------------------
+   def merge(self, other):
+      """Adds other CacheStats' counts (e.g. from a worker process) into
+      these"""
+
+      for name in self.COUNTERS:
+         self.counts[name].update(other.counts[name])
+
+
+   #-----------------------------------------------------------------------------
+   # counts and memory, now
+   #-----------------------------------------------------------------------------
+   def snapshot(self, wordCache, tables):
+      """Adds up the counts, and what's in wordCache now, per word length.
+      wordCache - the WordCache counted for
+      tables - word length -> its WordTable, for their sizes
+      return - dict of "lengths" (word length -> dict of the COUNTERS,
+      "entries", "pinned", "bytes", "bytes_per_entry" and "table_bytes"),
+      "total" (the same, over all lengths) and "evictions". Bytes are
+      approximate (see the WordSets' sizeof())."""
+
+      lengths = collections.defaultdict(collections.Counter)
+      for name in self.COUNTERS:
+         for length, count in self.counts[name].items():
+            lengths[length][name] += count
+
+      # the key's pattern is as long as the words
+      for pinned, entries in ((True, wordCache.pinned),
+                              (False, wordCache.entries)):
+         for key, wordSet in entries.items():
+            length = lengths[key.index('!')]
+            length["entries"] += 1
+            length["pinned"] += pinned
+            length["bytes"] += wordSet.sizeof()
+
+      for length, table in tables.items():
+         lengths[length]["table_bytes"] += table.sizeof()
+
+      total = collections.Counter()
+      for length in lengths.values():
+         total.update(length)
+
+      retVal = {"lengths": {}, "evictions": wordCache.evictions}
+      for length, stats in sorted(lengths.items()) + [(None, total)]:
+         stats = {name: stats[name] for name in
+                  self.COUNTERS + ("entries", "pinned", "bytes",
+                                   "table_bytes")}
+         stats["bytes_per_entry"] = stats["bytes"] / max(stats["entries"], 1)
+         if length == None:
+            retVal["total"] = stats
+         else:
+            retVal["lengths"][length] = stats
+      return retVal
+
+
+   #-----------------------------------------------------------------------------
+   # one line summary
+   #-----------------------------------------------------------------------------
+   @staticmethod
+   def summary(snapshot):
+      """return - string of a snapshot()'s totals, on one line"""
+
+      total = snapshot["total"]
+      lookups = total[CacheStats.HITS] + total[CacheStats.DISK_HITS] + \
+                total[CacheStats.MISSES]
+      return ("cache: %d lookups, %.1f%% hits (%d seeded), %d disk hits, "
+              "%d misses, %d insertions, %d evictions, %d entries, %.1f KiB" %
+              (lookups, 100.0 * total[CacheStats.HITS] / max(lookups, 1),
+               total[CacheStats.SEED_HITS], total[CacheStats.DISK_HITS],
+               total[CacheStats.MISSES], total[CacheStats.INSERTIONS],
+               snapshot["evictions"], total["entries"], total["bytes"] / 1024.0))
+
+
+   #-----------------------------------------------------------------------------
+   # summary table
+   #-----------------------------------------------------------------------------
+   @staticmethod
+   def table(snapshot):
+      """return - string table of a snapshot(): its counts and memory for each
+      word length, then the totals"""
+
+      lines = [CacheStats.summary(snapshot),
+               "%6s %9s %9s %9s %9s %9s %9s %7s %11s %9s %11s" % (
+               "length", "hits", "seeded", "disk", "misses", "inserts",
+               "entries", "pinned", "cache KiB", "B/entry", "table KiB")]
+      rows = sorted(snapshot["lengths"].items()) + [("all", snapshot["total"])]
+      for length, stats in rows:
+         lines.append("%6s %9d %9d %9d %9d %9d %9d %7d %11.1f %9.1f %11.1f" % (
+                      length, stats[CacheStats.HITS],
+                      stats[CacheStats.SEED_HITS], stats[CacheStats.DISK_HITS],
+                      stats[CacheStats.MISSES], stats[CacheStats.INSERTIONS],
+                      stats["entries"], stats["pinned"], stats["bytes"] / 1024.0,
+                      stats["bytes_per_entry"], stats["table_bytes"] / 1024.0))
+      return "\n".join(lines)
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   from WordCache import WordCache
+   from WordSet import WordSet
+
+   cache = WordCache()
+   cache.pin("---!", WordSet(["CAT", "HAT"]))
+   cache["-A-!"] = WordSet(["CAT", "HAT"])
+   stats = CacheStats()
+   stats.count(CacheStats.HITS, 3)
+   stats.count(CacheStats.MISSES, 3)
+   stats.count(CacheStats.INSERTIONS, 3)
+   print(CacheStats.table(stats.snapshot(cache, {})))
+
+# Fin
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import bisect
+import struct
+import collections
+from array import array
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from GuessLetter import GuessLetter
+   from GuessWord import GuessWord
+   from HangmanGame import HangmanGame
+   import util
+else:
+   from src.GuessLetter import GuessLetter
+   from src.GuessWord import GuessWord
+   from src.HangmanGame import HangmanGame
+   from src import util
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+#-------------------------------------------------------------------------------
+# Outcome of a guess
+#-------------------------------------------------------------------------------
+def outcome(guess, word):
+   """What the player sees after guessing guess (a letter or word) when the
+   secret word is word.
+   return - bitmask of the positions a guessed letter is at (0 for a miss),
+   or for a guessed word, 0 for a miss and -1 for a win"""
+   if len(guess) == len(word) and guess == word:
+      return -1
+   if len(guess) != 1:
+      return 0
+   return sum(1 << i for i, letter in enumerate(word) if letter == guess)
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class DecisionTree:
+   """Every guess a (deterministic) strategy would make, for every game state
+   reachable from a dictionary, compiled into a tree per word length. Each node
+   is a guess, and its children are what to guess next given each outcome (see
+   outcome()) of that guess.
+
+   Nodes are stored in flat arrays: node i guesses guesses[i], and its children
+   are childOutcomes/childNodes[firstChild[i]:firstChild[i + 1]], in outcome
+   order.
+
+   File layout (little-endian, like DictionarySnapshot's):
+     - header: MAGIC, VERSION, max wrong guesses, and the number of roots,
+       nodes, and children, and the size of the guesses
+     - roots: (word length, root node) uint32 pairs
+     - firstChild: number of nodes + 1 uint32s
+     - childOutcomes: int64s
+     - childNodes: uint32s
+     - guesses: each node's guess, ASCII, newline separated"""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   MAGIC   = b"HANGTREE"
+   # bump whenever the file format changes
+   VERSION = 2
+
+   # magic, version, max wrong guesses, roots, nodes, children, guesses' bytes
+   HEADER = struct.Struct("<8sIIIIII")
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, maxWrongGuesses):
+      """Initialize an empty DecisionTree for games with maxWrongGuesses."""
+
+      self.maxWrongGuesses = maxWrongGuesses
+
+      # word length -> root node
+      self.roots = {}
+
+      self.guesses = []
+      self.firstChild = array('L', [0])
+      self.childOutcomes = array('q')
+      self.childNodes = array('L')
+
+
+   #-----------------------------------------------------------------------------
+   # compile
+   #-----------------------------------------------------------------------------
+   def build(self, strategy, words):
+      """Walks every game state reachable by strategy when the secret word is
+      one of words, adding a node for each. Games with the same guesses and
+      outcomes so far are walked together, so each state is only asked once.
+      strategy - e.g. a FrequencyStrategy, loaded with the dictionary"""
+
+      byLength = collections.defaultdict(list)
+      for word in words:
+         byLength[len(word)].append(word.upper())
+
+      for length in sorted(byLength):
+         self.roots[length] = self.buildLength(strategy, byLength[length])
+         util.DBG("length %d: %d nodes" % (length, len(self.guesses)), DEBUG)
+
+
+   #-----------------------------------------------------------------------------
+   # compile one length
+   #-----------------------------------------------------------------------------
+   def buildLength(self, strategy, words):
+      """Adds the nodes for words, which are all the same length, breadth first
+      so each node's children are next to each other.
+      return - index of the root node"""
+
+      root = len(self.guesses)
+
+      # (guesses so far, secret words still in play)
+      queue = collections.deque([((), words)])
+      nextNode = root + 1
+      while queue:
+         path, group = queue.popleft()
+
+         # ask the strategy, as if playing any of the group's words
+         strategy.newGame()
+         guess = strategy.nextGuess(self.replay(group[0], path))
+         self.guesses.append(guess.guess)
+
+         # group the words by what they'd show for the guess
+         outcomes = collections.defaultdict(list)
+         for word in group:
+            outcomes[outcome(guess.guess, word)].append(word)
+
+         # a child for every outcome that doesn't end the game
+         for result in sorted(outcomes):
+            members = outcomes[result]
+            game = self.replay(members[0], path + (guess,))
+            if game.gameStatus() == HangmanGame.KEEP_GUESSING:
+               self.childOutcomes.append(result)
+               self.childNodes.append(nextNode)
+               nextNode += 1
+               queue.append((path + (guess,), members))
+         self.firstChild.append(len(self.childNodes))
+
+      return root
+
+
+   #-----------------------------------------------------------------------------
+   # replay a game
+   #-----------------------------------------------------------------------------
+   def replay(self, word, path):
+      """return - new HangmanGame for word with path's guesses made"""
+
+      game = HangmanGame(word, self.maxWrongGuesses)
+      for guess in path:
+         guess.makeGuess(game)
+      return game
+
+
+   #-----------------------------------------------------------------------------
+   # root lookup
+   #-----------------------------------------------------------------------------
+   def root(self, length):
+      """return - root node for games of length
+      exception - KeyError if there aren't any"""
+
+      return self.roots[length]
+
+
+   #-----------------------------------------------------------------------------
+   # child lookup
+   #-----------------------------------------------------------------------------
+   def child(self, node, result):
+      """return - the node to go to from node when its guess had outcome result
+      exception - KeyError if there isn't one"""
+
+      # a node's children are in outcome order
+      last = self.firstChild[node + 1]
+      i = bisect.bisect_left(self.childOutcomes, result, self.firstChild[node],
+                             last)
+      if i < last and self.childOutcomes[i] == result:
+         return self.childNodes[i]
+      raise KeyError((node, result))
+
+
+   #-----------------------------------------------------------------------------
+   # node's guess
+   #-----------------------------------------------------------------------------
+   def guess(self, node):
+      """return - GuessLetter or GuessWord for node"""
+
+      guess = self.guesses[node]
+      if len(guess) == 1:
+         return GuessLetter(guess)
+      return GuessWord(guess)
+
+
+   #-----------------------------------------------------------------------------
+   # save
+   #-----------------------------------------------------------------------------
+   def save(self, filepath):
+      """Writes the tree to filepath, in the binary format above.
+      exception - IOError if file can't be written"""
+
+      guesses = "\n".join(self.guesses).encode('ascii')
+      numNodes = len(self.guesses)
+      numChildren = len(self.childNodes)
+      roots = [number for length in sorted(self.roots)
+               for number in (length, self.roots[length])]
+
+      with open(filepath, 'wb') as out:
+         out.write(self.HEADER.pack(self.MAGIC, self.VERSION,
+                                    self.maxWrongGuesses, len(self.roots),
+                                    numNodes, numChildren, len(guesses)))
+         out.write(struct.pack("<%dI" % len(roots), *roots))
+         out.write(struct.pack("<%dI" % (numNodes + 1), *self.firstChild))
+         out.write(struct.pack("<%dq" % numChildren, *self.childOutcomes))
+         out.write(struct.pack("<%dI" % numChildren, *self.childNodes))
+         out.write(guesses)
+
+
+   #-----------------------------------------------------------------------------
+   # load
+   #-----------------------------------------------------------------------------
+   @classmethod
+   def load(cls, filepath):
+      """Reads a tree written by save().
+      return - the DecisionTree
+      exception - IOError if file can't be read, ValueError if it's not a
+      DecisionTree of this version"""
+
+      with open(filepath, 'rb') as tree:
+         data = tree.read()
+
+      notTree = ValueError("%s is not a version %d decision tree" %
+                           (filepath, cls.VERSION))
+      if len(data) < cls.HEADER.size:
+         raise notTree
+      (magic, version, maxWrongGuesses, numRoots, numNodes, numChildren,
+       guessBytes) = cls.HEADER.unpack_from(data)
+      if magic != cls.MAGIC or version != cls.VERSION or \
+         len(data) != (cls.HEADER.size + 4 * 2 * numRoots + 4 * (numNodes + 1) +
+                       (8 + 4) * numChildren + guessBytes):
+         raise notTree
+
+      def read(code, count):
+         """return - the next count little-endian code (struct format)s"""
+         nonlocal offset
+         fields = struct.unpack_from("<%d%s" % (count, code), data, offset)
+         offset += struct.calcsize("<%d%s" % (count, code))
+         return fields
+
+      offset = cls.HEADER.size
+      roots = read("I", 2 * numRoots)
+      retVal = cls(maxWrongGuesses)
+      retVal.roots = dict(zip(roots[::2], roots[1::2]))
+      retVal.firstChild = array('L', read("I", numNodes + 1))
+      retVal.childOutcomes = array('q', read("q", numChildren))
+      retVal.childNodes = array('L', read("I", numChildren))
+      retVal.guesses = str(data[offset:], 'ascii').split("\n") if numNodes else []
+      if len(retVal.guesses) != numNodes:
+         raise notTree
+      return retVal
+
+
+   #-----------------------------------------------------------------------------
+   # len(DecisionTree)
+   #-----------------------------------------------------------------------------
+   def __len__(self):
+      """DecisionTree's length is its number of nodes"""
+
+      return len(self.guesses)
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   print(outcome("A", "FACTUAL"), outcome("Q", "FACTUAL"),
+         outcome("FACTUAL", "FACTUAL"), outcome("NATURAL", "FACTUAL"))
+
+# Fin
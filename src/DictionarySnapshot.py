@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import json
+import mmap
+import struct
+import collections
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from WordTable import WordTable, LETTERS
+else:
+   from src.WordTable import WordTable, LETTERS
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class DictionarySnapshot:
+   """Binary snapshot of a loaded dictionary, for fast startup. Compiled once
+   from a FrequencyStrategy with write(), then memory mapped on load.
+
+   File layout:
+     - header: MAGIC, VERSION, and the size of the directory
+     - directory: JSON of word length -> offsets of its sections
+     - per word length, each section 8-byte aligned:
+       - words:  all the words, sorted, back to back (fixed stride = length)
+       - index:  (position, letter) -> bitset of word ids, little-endian, each
+                 (count + 7) // 8 bytes, positions in order, letters A-Z
+       - counts: 26 little-endian uint32 letter counts of all the words
+       - seed:   bitset of the words without the seeded first guess letter,
+                 then its 26 letter counts (only if seeded)"""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   MAGIC   = b"HANGSNAP"
+   VERSION = 1
+
+   # magic, version, directory size
+   HEADER = struct.Struct("<8sII")
+
+   # letter counts
+   COUNTS = struct.Struct("<26I")
+
+   # directory entries that are offsets into the file
+   OFFSETS = ("words", "index", "counts", "seedBits")
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, filepath):
+      """Memory maps a snapshot written by write().
+      exception - IOError if file can't be read, ValueError if it's not a
+      snapshot of this version"""
+
+      with open(filepath, 'rb') as snapshot:
+         self.map = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+      self.buffer = memoryview(self.map)
+
+      magic, version, dirSize = self.HEADER.unpack_from(self.buffer)
+      if magic != self.MAGIC or version != self.VERSION:
+         raise ValueError("%s is not a version %d dictionary snapshot" %
+                          (filepath, self.VERSION))
+      directory = json.loads(str(self.buffer[self.HEADER.size:
+                                             self.HEADER.size + dirSize], 'ascii'))
+      self.directory = {int(length): sections
+                        for length, sections in directory.items()}
+
+
+   #-----------------------------------------------------------------------------
+   # is it one?
+   #-----------------------------------------------------------------------------
+   @classmethod
+   def isSnapshot(cls, filepath):
+      """return - True if filepath starts like a snapshot"""
+
+      with open(filepath, 'rb') as snapshot:
+         return snapshot.read(len(cls.MAGIC)) == cls.MAGIC
+
+
+   #-----------------------------------------------------------------------------
+   # word lengths
+   #-----------------------------------------------------------------------------
+   def lengths(self):
+      """return - the word lengths in the snapshot, in order"""
+
+      return sorted(self.directory)
+
+
+   #-----------------------------------------------------------------------------
+   # load a table
+   #-----------------------------------------------------------------------------
+   def table(self, length):
+      """return - WordTable of the words of length, with its index read straight
+      out of the snapshot instead of rebuilt"""
+
+      sections = self.directory[length]
+      count = sections["count"]
+      start = sections["words"]
+      words = self.buffer[start:start + count * length]
+
+      size = (count + 7) // 8
+      offset = sections["index"]
+      positionBits = []
+      for position in range(length):
+         bits = {}
+         for letter in LETTERS:
+            letterBits = int.from_bytes(self.buffer[offset:offset + size], 'little')
+            if letterBits:
+               bits[letter] = letterBits
+            offset += size
+         positionBits.append(bits)
+
+      return WordTable(words, positionBits, length)
+
+
+   #-----------------------------------------------------------------------------
+   # letter counts
+   #-----------------------------------------------------------------------------
+   def letterFreq(self, length):
+      """return - collections.Counter of the letters of all words of length"""
+
+      return self.counts(self.directory[length]["counts"])
+
+
+   #-----------------------------------------------------------------------------
+   # seeded first miss
+   #-----------------------------------------------------------------------------
+   def seed(self, length):
+      """return - (letter, bitset of words without it, their collections.Counter
+      of letters) for the seeded first miss of length, or None if not seeded"""
+
+      sections = self.directory[length]
+      if sections["seed"] == None:
+         return None
+
+      offset = sections["seedBits"]
+      size = (sections["count"] + 7) // 8
+      bits = int.from_bytes(self.buffer[offset:offset + size], 'little')
+      return (sections["seed"], bits, self.counts(offset + self.align(size)))
+
+
+   #-----------------------------------------------------------------------------
+   # read letter counts
+   #-----------------------------------------------------------------------------
+   def counts(self, offset):
+      """return - collections.Counter of the letter counts at offset"""
+
+      counts = self.COUNTS.unpack_from(self.buffer, offset)
+      return collections.Counter({letter: count
+                                  for letter, count in zip(LETTERS, counts)
+                                  if count})
+
+
+   #-----------------------------------------------------------------------------
+   # 8-byte alignment
+   #-----------------------------------------------------------------------------
+   @staticmethod
+   def align(size):
+      """return - size rounded up to a multiple of 8"""
+
+      return (size + 7) // 8 * 8
+
+
+   #-----------------------------------------------------------------------------
+   # compile
+   #-----------------------------------------------------------------------------
+   @classmethod
+   def write(cls, strategy, filepath):
+      """Writes a snapshot of strategy's dictionary tables, their letter counts,
+      and its seeded cache entries to filepath.
+      strategy - a FrequencyStrategy, freshly loaded from a dictionary
+      exception - IOError if file can't be written"""
+
+      directory = {}
+      sections = bytearray()
+
+      def add(data):
+         """appends data to sections, aligned. return - its offset in sections"""
+         offset = len(sections)
+         sections.extend(data)
+         sections.extend(bytes(cls.align(len(data)) - len(data)))
+         return offset
+
+      def counts(letterFreq):
+         """return - letterFreq packed as COUNTS"""
+         return cls.COUNTS.pack(*[letterFreq[letter] for letter in LETTERS])
+
+      for length in strategy.lengths():
+         table = strategy.table(length)
+         if table.edited:
+            # words added or removed at runtime: sorted, and without gaps
+            table = WordTable(table.wordsIn(table.everything))
+         size = (len(table) + 7) // 8
+         entry = {"count": len(table), "seed": None}
+
+         entry["words"] = add(table.data)
+         entry["index"] = add(b"".join(
+            table.positionBits[position].get(letter, 0).to_bytes(size, 'little')
+            for position in range(length) for letter in LETTERS))
+         entry["counts"] = add(counts(strategy.wordCache[strategy.rootKey(length)]
+                                      .letterFreq))
+
+         letter = strategy.seedLetters.get(length)
+         if letter != None:
+            seeded = strategy.wordCache[strategy.rootKey(length) + letter]
+            entry["seed"] = letter
+            bits = table.everything & ~table.letterBits[letter]
+            entry["seedBits"] = add(bits.to_bytes(size, 'little'))
+            add(counts(seeded.letterFreq))
+
+         directory[length] = entry
+
+      # offsets so far are into sections; make them into the whole file
+      dirSize = 0
+      while True:
+         start = cls.align(cls.HEADER.size + dirSize)
+         text = json.dumps({str(length): {key: (value + start
+                                                if key in cls.OFFSETS else value)
+                                          for key, value in entry.items()}
+                            for length, entry in directory.items()},
+                           sort_keys=True).encode('ascii')
+         if len(text) <= dirSize:
+            break
+         dirSize = len(text)
+
+      with open(filepath, 'wb') as out:
+         out.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, dirSize))
+         out.write(text.ljust(start - cls.HEADER.size))
+         out.write(sections)
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   snapshot = DictionarySnapshot("words.snap")
+   print(snapshot.lengths())
+
+# Fin
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import os
+import zlib
+import struct
+import sqlite3
+import collections
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from WordTable import LETTERS
+else:
+   from src.WordTable import LETTERS
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class DiskCache:
+   """Second cache tier, behind the in-memory WordCache: an sqlite file of
+   WordSets keyed by game state (see FrequencyStrategy.key()), so the work of
+   narrowing them down survives the process and the next run starts warm.
+
+   Each entry is the bitset of its words' ids in their length's WordTable
+   (zlib compressed) and its letter counts, so it can be loaded back into any
+   kind of WordSet. Ids are only meaningful for the dictionary they came from,
+   so the file is tagged with the dictionary's content hash, and a file with
+   some other dictionary's entries is emptied on open.
+
+   Safe to use from forked processes (each reconnects) and from several at
+   once (sqlite locks the file)."""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   # bump whenever the entry format changes
+   VERSION = 1
+
+   # letter counts
+   COUNTS = struct.Struct("<26I")
+
+   # puts between commits
+   COMMIT_EVERY = 1000
+
+   # seconds to wait for another process's lock
+   TIMEOUT = 60.0
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, filepath, dictionaryHash):
+      """Opens (or creates) the cache file for the dictionary with content hash
+      dictionaryHash, emptying it if it was for a different dictionary.
+      exception - sqlite3.Error if the file can't be opened"""
+
+      self.filepath = filepath
+      self.dictionaryHash = dictionaryHash
+      self.connection = None
+      self.pid = None
+      self.uncommitted = 0
+
+      # keys known to be on disk, so they're not written again
+      self.saved = set()
+
+      db = self.db()
+      db.execute("CREATE TABLE IF NOT EXISTS meta "
+                 "(name TEXT PRIMARY KEY, value TEXT)")
+      db.execute("CREATE TABLE IF NOT EXISTS entries "
+                 "(key TEXT PRIMARY KEY, bits BLOB, counts BLOB)")
+      tag = "%d:%s" % (self.VERSION, dictionaryHash)
+      row = db.execute("SELECT value FROM meta WHERE name = 'tag'").fetchone()
+      if row == None or row[0] != tag:
+         # stale (or new): start over
+         db.execute("DELETE FROM entries")
+         db.execute("INSERT OR REPLACE INTO meta VALUES ('tag', ?)", (tag,))
+      db.commit()
+
+
+   #-----------------------------------------------------------------------------
+   # connection
+   #-----------------------------------------------------------------------------
+   def db(self):
+      """return - sqlite connection for this process. A forked child can't use
+      its parent's, so it gets its own."""
+
+      if self.pid != os.getpid():
+         self.connection = sqlite3.connect(self.filepath, timeout=self.TIMEOUT)
+         self.pid = os.getpid()
+         self.uncommitted = 0
+      return self.connection
+
+
+   #-----------------------------------------------------------------------------
+   # get
+   #-----------------------------------------------------------------------------
+   def get(self, key, table, wordSetType):
+      """return - new wordSetType of the entry for key, whose words are in
+      WordTable table, or None if it's not on disk"""
+
+      row = self.db().execute("SELECT bits, counts FROM entries WHERE key = ?",
+                              (key,)).fetchone()
+      if row == None:
+         return None
+
+      bits = int.from_bytes(zlib.decompress(row[0]), 'little')
+      letterFreq = collections.Counter({letter: count for letter, count
+                                        in zip(LETTERS, self.COUNTS.unpack(row[1]))
+                                        if count})
+      wordSet = wordSetType()
+      wordSet.narrow(table, bits, letterFreq)
+      self.saved.add(key)
+      return wordSet
+
+
+   #-----------------------------------------------------------------------------
+   # put
+   #-----------------------------------------------------------------------------
+   def put(self, key, table, wordSet):
+      """Writes wordSet, whose words are in WordTable table, to disk under key,
+      unless it's already there. Commits every COMMIT_EVERY puts; see
+      commit()."""
+
+      if key in self.saved:
+         return
+
+      bits = wordSet.bits.to_bytes((len(table) + 7) // 8, 'little')
+      counts = self.COUNTS.pack(*[wordSet.letterFreq[letter]
+                                  for letter in LETTERS])
+      self.db().execute("INSERT OR IGNORE INTO entries VALUES (?, ?, ?)",
+                        (key, zlib.compress(bits, 1), counts))
+      self.saved.add(key)
+
+      self.uncommitted += 1
+      if self.uncommitted >= self.COMMIT_EVERY:
+         self.commit()
+
+
+   #-----------------------------------------------------------------------------
+   # commit
+   #-----------------------------------------------------------------------------
+   def commit(self):
+      """Makes the puts so far permanent."""
+
+      self.db().commit()
+      self.uncommitted = 0
+
+
+   #-----------------------------------------------------------------------------
+   # len(DiskCache)
+   #-----------------------------------------------------------------------------
+   def __len__(self):
+      """DiskCache's length is its number of entries on disk"""
+
+      return self.db().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   from WordTable import WordTable
+   from MaskWordSet import MaskWordSet
+
+   table = WordTable(["CAT", "HAT", "FAT"])
+   wordSet = MaskWordSet()
+   wordSet.narrow(table, table.match("-AT", set(["F"])))
+
+   cache = DiskCache(":memory:", "test")
+   cache.put("-AT!F", table, wordSet)
+   print(len(cache), cache.get("-AT!F", table, MaskWordSet))
+
+# Fin
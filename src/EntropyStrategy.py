@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import math
+import collections
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from FrequencyStrategy import FrequencyStrategy
+   from GuessLetter import GuessLetter
+   from WordTable import popcount, matches
+   from Profiler import profiler
+   import util
+else:
+   from src.FrequencyStrategy import FrequencyStrategy
+   from src.GuessLetter import GuessLetter
+   from src.WordTable import popcount, matches
+   from src.Profiler import profiler
+   from src import util
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+#-------------------------------------------------------------------------------
+# Split words up by a letter
+#-------------------------------------------------------------------------------
+def partition(table, bits, letter):
+   """Splits the words in bitset bits of WordTable table up by what guessing
+   letter would show: which of their positions it's at. One pass over the
+   table's positional index, splitting every part at each position letter is
+   ever at.
+   return - list of the parts' sizes, the first being the words without letter
+   (which may be 0)"""
+
+   hit = bits & table.letterBits[letter]
+   parts = [hit] if hit else []
+   for position in table.positionBits:
+      at = position.get(letter, 0) & hit
+      if not at:
+         continue # e.g. a position that's been revealed already
+      split = []
+      for part in parts:
+         yes = part & at
+         if yes:
+            split.append(yes)
+            if yes != part:
+               split.append(part ^ yes)
+         else:
+            split.append(part)
+      parts = split
+
+   total = popcount(bits)
+   sizes = [popcount(part) for part in parts]
+   return [total - sum(sizes)] + sizes
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class EntropyStrategy(FrequencyStrategy):
+   """FrequencyStrategy that picks letters by information gain instead: the
+   letter whose outcomes (see partition()) split the possible words up the
+   most evenly, as measured by their entropy. Pure information gain guesses
+   wrong too often (see the README), so a miss is charged for, with the charge
+   growing as the wrong guesses left run out.
+
+   The partitions come from bitmask operations on the word tables' positional
+   index, rather than from the words, and each game state's letter is only
+   worked out once (they're memoised by state). With a cache budget, the memo
+   is least recently used first, and kept to as many states as the WordCache
+   holds, so it goes with the cache's budget rather than growing forever."""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   # bits of information a miss costs, over the number of wrong guesses left
+   MISS_COST = 2.0
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, *args, **kwargs):
+      """Initialize EntropyStrategy. Same arguments as FrequencyStrategy."""
+
+      # game state (cache key and wrong guesses left) -> letter to guess,
+      # oldest first
+      self.letters = collections.OrderedDict()
+
+      FrequencyStrategy.__init__(self, *args, **kwargs)
+
+
+   #-----------------------------------------------------------------------------
+   # pick a guess
+   #-----------------------------------------------------------------------------
+   def pick(self, wordSet, key, guessedLetters, wrongWords, guessesLeft):
+      """Same as FrequencyStrategy.pick(), except that letter guesses are
+      remembered per game state, so they're only worked out once.
+      return - the GuessWord/GuessLetter"""
+
+      if len(wordSet) <= guessesLeft:
+         return FrequencyStrategy.pick(self, wordSet, key, guessedLetters,
+                                       wrongWords, guessesLeft)
+
+      state = (key, guessesLeft)
+      letter = self.letters.get(state)
+      if letter != None:
+         self.letters.move_to_end(state)
+         return GuessLetter(letter)
+
+      with profiler.span("letterStrategy"):
+         letter = self.letterStrategy(wordSet, guessedLetters, guessesLeft)
+      self.letters[state] = letter
+      if self.wordCache.policy != self.wordCache.UNBOUNDED:
+         while len(self.letters) > max(len(self.wordCache), 1):
+            self.letters.popitem(last=False)
+      return GuessLetter(letter)
+
+
+   #-----------------------------------------------------------------------------
+   # Forget cached states
+   #-----------------------------------------------------------------------------
+   def invalidate(self, length, words):
+      """Same as FrequencyStrategy.invalidate(), and forgets the letters picked
+      for those states too."""
+
+      FrequencyStrategy.invalidate(self, length, words)
+      for state in list(self.letters):
+         pattern, wrongLetters = self.unkey(state[0])
+         if any(matches(word, pattern, wrongLetters) for word in words):
+            del self.letters[state]
+
+
+   #-----------------------------------------------------------------------------
+   # pick-a-letter strategy
+   #-----------------------------------------------------------------------------
+   def letterStrategy(self, wordSet, letterSet, guessesLeft):
+      """Guess a letter, based on how well it splits up the possible words
+      return - the letter to be guessed (string)"""
+
+      if not len(wordSet):
+         return FrequencyStrategy.letterStrategy(self, wordSet, letterSet,
+                                                 guessesLeft)
+
+      table = self.tables[len(next(iter(wordSet.words)))] \
+              if not hasattr(wordSet, "table") else wordSet.table
+      bits = wordSet.bits
+      total = float(len(wordSet))
+      missCost = self.MISS_COST / max(guessesLeft, 1)
+
+      # Letters in none of the words can't help. Ties go z-a, same as
+      # FrequencyStrategy.
+      candidates = []
+      for letter, count in wordSet.letterFreq.items():
+         if letter in letterSet or not count:
+            continue
+         sizes = partition(table, bits, letter)
+         gain = -sum(size / total * math.log2(size / total)
+                     for size in sizes if size)
+         candidates.append((gain - sizes[0] / total * missCost, letter))
+
+      if candidates:
+         _, letter = max(candidates)
+         util.DBG("GUESS: " + letter, DEBUG)
+         return letter
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   from WordTable import WordTable
+   table = WordTable(["CAT", "HAT", "FAT", "TAT", "COT"])
+   print(partition(table, table.everything, 'T'))
+   print(partition(table, table.everything, 'C'))
+
+# Fin
@@ -3,28 +3,42 @@
 
 # Python imports
 import os
-import re
-import collections
+import queue
+import hashlib
+import itertools
+import threading
 
 # local imports
-if __name__ == '__main__':
-   # This way so it can be run as main for quick testing.
+if not __package__:
+   # This way so it can be run as main for quick testing (or imported by
+   # another src module that is).
    # If we had a setup.py and installed this, it wouldn't be needed.
    from GuessLetter import GuessLetter
    from GuessWord import GuessWord
    from HangmanGame import HangmanGame
-   from WordSet import WordSet
+   from MaskWordSet import MaskWordSet
+   from WordTable import WordTable, LETTERS, matches
+   from WordCache import WordCache
+   from DictionarySnapshot import DictionarySnapshot
+   from DiskCache import DiskCache
+   from CacheStats import CacheStats
+   from Profiler import profiler
    import util
 else:
    from src.GuessLetter import GuessLetter
    from src.GuessWord import GuessWord
    from src.HangmanGame import HangmanGame
-   from src.WordSet import WordSet
+   from src.MaskWordSet import MaskWordSet
+   from src.WordTable import WordTable, LETTERS, matches
+   from src.WordCache import WordCache
+   from src.DictionarySnapshot import DictionarySnapshot
+   from src.DiskCache import DiskCache
+   from src.CacheStats import CacheStats
+   from src.Profiler import profiler
    from src import util
 
 # CONSTANTS
 DEBUG  = False # true for Debug print outs
-TIMING = False # true for Timing print outs 
 
 #===============================================================================
 # CLASS
@@ -39,24 +53,80 @@ class FrequencyStrategy:
    # don't pre-seed cache for word sets smaller than this
    SEED_MIN = 10
 
+   # order letters with the same frequency are guessed in: "z-a" or "a-z"
+   TIES = "z-a"
+
 
    #-----------------------------------------------------------------------------
    # ctor
    #-----------------------------------------------------------------------------
-   def __init__(self, filepath):
-      """Initialize FrequencyStrategy"""
-
-      self.possible = WordSet()
+   def __init__(self, filepath, wordSetType=MaskWordSet, wordCache=None,
+                diskCachePath=None, base=None, maxWrongGuesses=5):
+      """Initialize FrequencyStrategy
+      filepath - dictionary file, or a DictionarySnapshot of one
+      wordSetType - WordSet class to hold possible words in (e.g. the compact
+      bitmap-backed MaskWordSet, or WordSet for plain sets of strings)
+      wordCache - empty WordCache to use, for a bounded cache. Default is an
+      unbounded one.
+      diskCachePath - file for a DiskCache behind wordCache, which entries
+      evicted from it (and, on save(), the rest of them) are written to and
+      cache misses are read back from, across runs. Default is none.
+      base - another strategy with the same dictionary to share the word
+      tables of, instead of loading the dictionary again (e.g. to compare
+      strategies). Everything else, e.g. the cache, is this one's own.
+      maxWrongGuesses - max wrong guesses the games will be played with, for
+      picking the first guess to pre-seed the cache with (see seedCache())"""
+
+      self.wordSetType = wordSetType
+      self.possible = self.wordSetType()
+
+      # cache key of the game state self.possible is the words of, if any
+      self.possibleKey = None
 
       # Cache of possible words given current game state.
       # Initially just all the possible words, divided out based on length.
       # As games progress, more WordSets-possible-given-game-state-X are added.
-      self.wordCache = collections.defaultdict(WordSet)
+      # The initial and pre-seeded WordSets are pinned, so they're never evicted.
+      if wordCache == None:
+         wordCache = WordCache()
+      self.wordCache = wordCache
+
+      # how lookups in it have gone; see stats()
+      self.cacheStats = CacheStats()
+
+      # StateTrace to record the game states looked up in, if any
+      self.trace = None
+
+      # (key, WordSet)s a background warm() has finished, for pinWarmed()
+      self.warmQueue = None
+
+      # All the dictionary words, divided out by length into WordTables.
+      # Their indexes narrow the possible words down for cache misses.
+      # Each length's table (and its cache entries) is only built the first
+      # time a game of that length needs it; see table().
+      self.tables = {}
+
+      # word length -> first guess letter pre-computed misses were seeded for
+      self.seedLetters = {}
+      self.maxWrongGuesses = maxWrongGuesses
 
       # process dictionary file
-      self.parseWordsFile(filepath)
+      self.filepath = filepath
+      self.snapshot = None
+      self.buckets = {}
+      self.base = base
+      if base != None:
+         self.filepath = base.filepath # has it all already
+      elif DictionarySnapshot.isSnapshot(filepath):
+         self.snapshot = DictionarySnapshot(filepath)
+      else:
+         self.parseWordsFile(filepath)
 
-      self.seedCache()
+      # second cache tier, tagged with the dictionary it's for
+      self.diskCache = None
+      if diskCachePath != None:
+         self.diskCache = DiskCache(diskCachePath, self.dictionaryHash())
+         self.wordCache.spill = self.spill
 
       self.newGame()
 
@@ -68,33 +138,67 @@ class FrequencyStrategy:
       """Updates possible words based on previous guess, then decides whether
       to guess a word or a letter, and returns the GuessWord/GuessLetter."""
 
-      with util.Timer() as upTime:
+      with profiler.span("updatePossibleWords"):
          self.updatePossibleWords(game)
-      util.DBG("Update took %.09f sec." % upTime.interval, TIMING)
+
+      return self.choose(game, self.possible)
+
+
+   #-----------------------------------------------------------------------------
+   # pick a guess
+   #-----------------------------------------------------------------------------
+   def choose(self, game, wordSet):
+      """Decides whether to guess a word or a letter, given that wordSet is the
+      game's possible words. Doesn't change wordSet or self, so it's fine to
+      use on a cached WordSet.
+      return - the GuessWord/GuessLetter"""
+
+      return self.pick(wordSet, self.key(game), game.getAllGuessedLetters(),
+                       game.getIncorrectlyGuessedWords(),
+                       game.numWrongGuessesRemaining())
+
+
+   #-----------------------------------------------------------------------------
+   # pick a guess, without a game
+   #-----------------------------------------------------------------------------
+   def pick(self, wordSet, key, guessedLetters, wrongWords, guessesLeft):
+      """Same as choose(), given the game's state instead of the game.
+      key - the state's cache key
+      guessedLetters - all the letters guessed, right and wrong
+      wrongWords - the words guessed wrong
+      guessesLeft - how many more wrong guesses are allowed
+      return - the GuessWord/GuessLetter"""
 
       # pick a strategy
       # if we can guess all the possible words and not lose, go for it.
-      if len(self.possible) <= game.numWrongGuessesRemaining():
-         return GuessWord(self.wordStrategy(game))
+      if len(wordSet) <= guessesLeft:
+         with profiler.span("wordStrategy"):
+            return GuessWord(self.wordStrategy(None, wordSet, wrongWords))
       else:
          # Pick a letter.
          # Any letter.
          # Not that letter.
-         return GuessLetter(self.letterStrategy(self.possible,
-                                                game.getAllGuessedLetters(),
-                                                game.numWrongGuessesRemaining()))
+         with profiler.span("letterStrategy"):
+            return GuessLetter(self.letterStrategy(wordSet, guessedLetters,
+                                                   guessesLeft))
 
 
    #-----------------------------------------------------------------------------
    # pick-a-word strategy
    #-----------------------------------------------------------------------------
-   def wordStrategy(self, game):
-      """Guess a word, based on possible words
+   def wordStrategy(self, game, wordSet=None, wrongWords=None):
+      """Guess a word, based on possible words (wordSet, default self.possible)
+      that isn't one of game's wrong guesses (or wrongWords, if given instead)
       return - the word to be guessed (string)"""
 
+      if wordSet == None:
+         wordSet = self.possible
+      if wrongWords == None:
+         wrongWords = game.getIncorrectlyGuessedWords()
+
       # sorted the word set for stable word scores
-      for word in sorted(self.possible.words):
-         if word not in game.getIncorrectlyGuessedWords():
+      for word in sorted(wordSet.words):
+         if word not in wrongWords:
             util.DBG("GUESS: " + word, DEBUG)
             return word
 
@@ -106,16 +210,20 @@ class FrequencyStrategy:
       """Guess a letter, based on letter frequency in possible words
       return - the letter to be guessed (string)"""
 
-      # Pick the first letter that hasn't been guessed.
-      # Sort letterFreq for stable word scores by ensuring that 11 a's always
+      # Pick the most frequent letter that hasn't been guessed.
+      # Break ties by letter for stable word scores by ensuring that 11 a's always
       # get guessed after 11 b's. Turns out a-z gets worse scores than z-a
-      # in the test dictionary.
-      for letter, _ in sorted(wordSet.letterFreq.most_common(),
-                              key=lambda lc: (lc[1], lc[0]), reverse=True): # z-a
-                              #key=lambda lc: (-lc[1], lc[0])): # a-z
-         if letter not in letterSet:
-            util.DBG("GUESS: " + letter, DEBUG)
-            return letter
+      # in the test dictionary. max() instead of sorting most_common(), since
+      # only the top one is needed.
+      candidates = [(count, letter) for letter, count in wordSet.letterFreq.items()
+                    if letter not in letterSet]
+      if candidates:
+         if self.TIES == "a-z":
+            _, letter = min((-count, letter) for count, letter in candidates)
+         else:
+            _, letter = max(candidates) # z-a
+         util.DBG("GUESS: " + letter, DEBUG)
+         return letter
 
 
    #-----------------------------------------------------------------------------
@@ -126,46 +234,210 @@ class FrequencyStrategy:
       return - Nothing. Updates self vars."""
 
       # check the cache before doing any work
-      if self.key(game) in self.wordCache:
+      length = game.getSecretWordLength()
+      if length not in self.tables:
+         with profiler.span("table"):
+            self.table(length) # first game of this length
+      key = self.key(game)
+      if self.trace != None:
+         self.trace.record(key)
+      with profiler.span("cache get"):
+         cached = self.wordCache.get(key)
+      if cached != None:
          # It's there. Use it.
-         self.possible = self.wordCache[self.key(game)].copy()
+         self.counted(key, length)
+         with profiler.span("copy"):
+            self.possible = cached.copy()
+         self.possibleKey = key
          return
 
-      # Set to use in the regex. Either any caps letter, 
-      # or not the incorrect letters.
-      wrongLetters = game.getIncorrectlyGuessedLetters()
-      if wrongLetters:
-         notWrongLetters = "[^" + "".join(wrongLetters) + "]{"
-      else:
-         notWrongLetters = "[A-Z]{"
+      # Maybe a previous run (or an eviction) left it on disk.
+      table = self.table(length)
+      if self.diskCache != None:
+         with profiler.span("disk get"):
+            stored = self.diskCache.get(key, table, self.wordSetType)
+         if stored != None:
+            self.cacheStats.count(CacheStats.DISK_HITS, length)
+            self.cacheStats.count(CacheStats.INSERTIONS, length)
+            self.possible = stored
+            self.possibleKey = key
+            self.wordCache[key] = stored.copy()
+            return
+
+      # Look up the words that match the game state in the dictionary's index,
+      # or just apply the last guess to the words from before it
+      self.cacheStats.count(CacheStats.MISSES, length)
+      with profiler.span("match"):
+         bits = self.match(table, game.getGuessedSoFar(),
+                           game.getIncorrectlyGuessedLetters(),
+                           self.possible, self.possibleKey)
+      with profiler.span("narrow"):
+         self.possible.narrow(table, bits)
+      self.possibleKey = key
 
-      # turn guessedSoFar into a regex using notWrongLetters
-      current = re.compile("(" + HangmanGame.MYSTERY_LETTER + 
-                           "+|[A-Z]+)").findall(game.getGuessedSoFar())
-      for i in range(len(current)):
-         if current[i][0] == HangmanGame.MYSTERY_LETTER:
-            current[i] = notWrongLetters + str(len(current[i])) + "}"
+      # cache results
+      with profiler.span("cache put"):
+         self.cache(game)
 
-      # match() only matches at start of string so add a final "$" to make sure
-      # it's a whole match and we're not saying "c-t" matches "catapult"
-      current.append("$") 
-      guessRegex = re.compile("".join(current))
 
-      # need a (different) set to iterate over whist I remove words
-      # from the possible set
-      tempPossibles = self.possible.words.copy()
+   #-----------------------------------------------------------------------------
+   # lots of guesses, without games
+   #-----------------------------------------------------------------------------
+   def solve(self, queries):
+      """Picks the guesses for lots of game states at once, e.g. for games
+      being played somewhere else, without their secret words (or games).
+      Identical queries are only worked out once, and they're done a word
+      length at a time. Their possible words come from (and go into) the
+      cache, the same as nextGuess()'s, but self.possible isn't touched.
+      queries - iterable of (pattern, wrong letters, wrong words, wrong guesses
+      left), e.g. ("F-CTU-L", "EIOS", (), 3)
+      return - list of the GuessWord/GuessLetter for each query, in order (the
+      same one for identical queries), or None where no dictionary word fits
+      exception - ValueError if a query's pattern or letters aren't A-Z (or
+      '-' for hidden letters), or it has negative wrong guesses left"""
+
+      # normalised query -> index into guesses, and how many times it was asked
+      unique = {}
+      asked = []
+      order = []
+      for pattern, wrongLetters, wrongWords, guessesLeft in queries:
+         query = (pattern.upper(),
+                  "".join(sorted(set("".join(wrongLetters).upper()))),
+                  frozenset(word.upper() for word in wrongWords), guessesLeft)
+         index = unique.get(query)
+         if index == None:
+            index = unique[query] = len(asked)
+            asked.append(0)
+         asked[index] += 1
+         order.append(index)
+
+      byLength = {}
+      for query, index in unique.items():
+         byLength.setdefault(len(query[0]), []).append((query, index))
+
+      guesses = [None] * len(asked)
+      for length, group in sorted(byLength.items()):
+         if length not in self.tables:
+            with profiler.span("table"):
+               self.table(length)
+         # fewest guesses first, so states' parents are cached before them
+         # (see lookup())
+         group.sort(key=lambda item: len(item[0][1]) + len(set(item[0][0])))
+         for (pattern, wrongLetters, wrongWords, guessesLeft), index in group:
+            letters = set(pattern.replace(HangmanGame.MYSTERY_LETTER, ""))
+            if not letters.union(wrongLetters).issubset(LETTERS) or \
+               guessesLeft < 0:
+               raise ValueError("not a game state: %r, %r, %d guesses left" %
+                                (pattern, wrongLetters, guessesLeft))
+            key = pattern + "!" + wrongLetters
+            if self.trace != None:
+               self.trace.record(key, asked[index])
+            wordSet = self.lookup(key, length)
+            guess = self.pick(wordSet, key, letters.union(wrongLetters),
+                              wrongWords, guessesLeft)
+            if guess.guess != None:
+               guesses[index] = guess
+
+      return [guesses[index] for index in order]
 
-      # test each word in the possibilites set
-      for word in tempPossibles:
-         # purge words that can't match current guess
-         if guessRegex.match(word) == None:
-            self.possible.words.remove(word)
 
-      # inform the WordSet that it's been updated
-      self.possible.updated()
+   #-----------------------------------------------------------------------------
+   # game state -> possible words
+   #-----------------------------------------------------------------------------
+   def lookup(self, key, length):
+      """Gets the possible words of the game state with cache key key (and
+      words of length) from the cache, or the disk cache, or else narrows them
+      down from the dictionary and caches them. Counted in cacheStats.
+      return - the WordSet, which mustn't be changed"""
+
+      wordSet = self.wordCache.get(key)
+      if wordSet != None:
+         self.counted(key, length)
+         return wordSet
+
+      if self.diskCache != None:
+         wordSet = self.diskCache.get(key, self.tables[length], self.wordSetType)
+         if wordSet != None:
+            self.cacheStats.count(CacheStats.DISK_HITS, length)
+      if wordSet == None:
+         self.cacheStats.count(CacheStats.MISSES, length)
+         pattern, wrongLetters = self.unkey(key)
+         previousKey = self.parentKey(key)
+         with profiler.span("narrow"):
+            wordSet = self.narrowed(pattern, wrongLetters,
+                                    self.wordCache.get(previousKey),
+                                    previousKey)
+
+      self.wordCache[key] = wordSet.copy()
+      self.cacheStats.count(CacheStats.INSERTIONS, length)
+      return wordSet
 
-      # cache results
-      self.cache(game)
+
+   #-----------------------------------------------------------------------------
+   # a cached state one guess back
+   #-----------------------------------------------------------------------------
+   def parentKey(self, key):
+      """return - cache key of a cached game state one guess before the one
+      with cache key key (without one of its revealed or wrong letters), to
+      narrow down from, or None if there isn't one"""
+
+      pattern, wrongLetters = self.unkey(key)
+      for letter in wrongLetters:
+         parent = pattern + "!" + wrongLetters.replace(letter, "")
+         if parent in self.wordCache:
+            return parent
+      for letter in set(pattern.replace(HangmanGame.MYSTERY_LETTER, "")):
+         parent = (pattern.replace(letter, HangmanGame.MYSTERY_LETTER) + "!" +
+                   wrongLetters)
+         if parent in self.wordCache:
+            return parent
+      return None
+
+
+   #-----------------------------------------------------------------------------
+   # find possibilities, without touching self
+   #-----------------------------------------------------------------------------
+   def narrowed(self, pattern, wrongLetters, previous=None, previousKey=None):
+      """Looks up the words that match a game state in the dictionary's index,
+      into a new WordSet. Doesn't change self or the cache, so it can run on
+      another thread, as long as the pattern's length's table() is loaded.
+      pattern - the game's guessed so far, e.g. "--E-"
+      wrongLetters - the game's incorrectly guessed letters
+      previous - the game's possible words as of its last guess, if known,
+      which can make narrowing down from them cheaper
+      previousKey - the cache key of the state previous is for, if known, so
+      only what's new since then needs looking up (see match())
+      return - the new WordSet"""
+
+      table = self.tables[len(pattern)]
+      wordSet = previous.copy() if previous != None else self.wordSetType()
+      wordSet.narrow(table, self.match(table, pattern, wrongLetters, previous,
+                                       previousKey))
+      return wordSet
+
+
+   #-----------------------------------------------------------------------------
+   # game state -> words
+   #-----------------------------------------------------------------------------
+   def match(self, table, pattern, wrongLetters, previous=None,
+             previousKey=None):
+      """Finds the words in WordTable table that match a game state. If
+      previous (a WordSet) is the words of an earlier state of the same game,
+      with cache key previousKey, that's just its words with the guesses since
+      applied (usually only the last one: a letter's revealed positions, or a
+      miss ANDNOTed out, like intersecting with the seeded misses). Otherwise,
+      or if previous would have to build its bitset (a sparse MaskWordSet: the
+      full lookup's quicker than that), it's the wordSetType's full lookup.
+      return - bitset of the matching words' ids"""
+
+      if previous != None and previousKey != None and \
+         not getattr(previous, "sparse", False) and previous.bits != None:
+         fromPattern, fromWrongLetters = self.unkey(previousKey)
+         bits = table.matchSince(previous.bits, fromPattern, fromWrongLetters,
+                                 pattern, wrongLetters)
+         if bits != None:
+            return bits
+      return self.wordSetType.match(table, pattern, wrongLetters)
 
 
    #-----------------------------------------------------------------------------
@@ -179,6 +451,27 @@ class FrequencyStrategy:
                      sorted(game.getIncorrectlyGuessedLetters()))
 
 
+   #-----------------------------------------------------------------------------
+   # Cache key -> game state
+   #-----------------------------------------------------------------------------
+   def unkey(self, key):
+      """return - (pattern, wrong letters) of the game state with cache key
+      key, the reverse of key()"""
+
+      pattern, _, wrongLetters = key.partition('!')
+      return pattern, wrongLetters
+
+
+   #-----------------------------------------------------------------------------
+   # Cache key for a new game
+   #-----------------------------------------------------------------------------
+   def rootKey(self, length):
+      """Returns the cache key of all the words of length, i.e. the state of a
+      game before any guesses."""
+
+      return HangmanGame.MYSTERY_LETTER * length + "!"
+
+
    #-----------------------------------------------------------------------------
    # Caching!
    #-----------------------------------------------------------------------------
@@ -187,6 +480,69 @@ class FrequencyStrategy:
 
       # save to dict
       self.wordCache[self.key(game)] = self.possible.copy()
+      self.cacheStats.count(CacheStats.INSERTIONS, game.getSecretWordLength())
+
+
+   #-----------------------------------------------------------------------------
+   # Count a hit
+   #-----------------------------------------------------------------------------
+   def counted(self, key, length):
+      """Counts a cache hit on key, for words of length, in cacheStats."""
+
+      self.cacheStats.count(CacheStats.HITS, length)
+      letter = self.seedLetters.get(length)
+      if letter != None and key == self.rootKey(length) + letter:
+         self.cacheStats.count(CacheStats.SEED_HITS, length)
+
+
+   #-----------------------------------------------------------------------------
+   # Cache stats
+   #-----------------------------------------------------------------------------
+   def stats(self):
+      """return - CacheStats.snapshot() of this strategy's cache: the lookup
+      counts, and entries and approximate bytes (of the cache and of the word
+      tables) per word length. Only what's in this process's cache."""
+
+      return self.cacheStats.snapshot(self.wordCache, self.tables)
+
+
+   #-----------------------------------------------------------------------------
+   # Spill to disk
+   #-----------------------------------------------------------------------------
+   def spill(self, key, wordSet):
+      """Writes a cache entry to the disk cache, e.g. as it's evicted."""
+
+      # the key's pattern is as long as the words
+      self.diskCache.put(key, self.tables[key.index('!')], wordSet)
+
+
+   #-----------------------------------------------------------------------------
+   # Persist cache
+   #-----------------------------------------------------------------------------
+   def save(self):
+      """Writes every (unpinned) cache entry to the disk cache, if there is one,
+      for the next run to start from."""
+
+      if self.diskCache == None:
+         return
+      for key, wordSet in list(self.wordCache.entries.items()):
+         self.spill(key, wordSet)
+      self.diskCache.commit()
+
+
+   #-----------------------------------------------------------------------------
+   # Dictionary fingerprint
+   #-----------------------------------------------------------------------------
+   def dictionaryHash(self):
+      """return - hex SHA-256 of the dictionary file (or snapshot) this was
+      loaded from"""
+
+      digest = hashlib.sha256()
+      with open(self.filepath, 'rb') as dictionary:
+         for chunk in iter(lambda: dictionary.read(1 << 20), b""):
+            digest.update(chunk)
+      return digest.hexdigest()
+
 
    #-----------------------------------------------------------------------------
    # reset for new game
@@ -195,13 +551,15 @@ class FrequencyStrategy:
       """Resets class variables to be ready for another game."""
 
       self.firstRun = True
+      self.pinWarmed()
 
 
    #-----------------------------------------------------------------------------
    # Read words file
    #-----------------------------------------------------------------------------
    def parseWordsFile(self, filepath):
-      """Reads the dictionary and places each word into the words cache.
+      """Reads the dictionary and divides the words up by length, ready for
+      table() to build them into WordTables on demand.
       Dictionary file must be one word per line.
       Does not verify the words (i.e. does not check that they've only got 
       letters in them).
@@ -210,44 +568,292 @@ class FrequencyStrategy:
       with open(filepath, 'r') as dictionary: 
          util.DBG(util.pretty_size(os.path.getsize(filepath)), DEBUG)
 
-         # read words file into set
-         for line in dictionary:
-            word = line.strip()
-            if word != "": # avoid empty lines
-               key = HangmanGame.MYSTERY_LETTER * len(word) + "!"
-               self.wordCache[key].words.add(word.upper())
+         # read words file in one go; split() skips the empty lines
+         words = dictionary.read().upper().split()
+
+      # group into lengths, without duplicates
+      words = sorted(set(words), key=len)
+      for length, bucket in itertools.groupby(words, len):
+         self.buckets[length] = list(bucket)
+
+
+   #-----------------------------------------------------------------------------
+   # Word lengths
+   #-----------------------------------------------------------------------------
+   def lengths(self):
+      """return - all the word lengths in the dictionary, in order, whether
+      their tables are built yet or not"""
+
+      if self.base != None:
+         return self.base.lengths()
+      lengths = set(self.snapshot.lengths() if self.snapshot != None
+                    else self.buckets)
+      # table() pops a length's words out of buckets when it builds it, so a
+      # built length is only in tables (as is a length addWords() added)
+      return sorted(lengths.union(length for length, table
+                                  in self.tables.items() if len(table)))
+
+
+   #-----------------------------------------------------------------------------
+   # Word length's table
+   #-----------------------------------------------------------------------------
+   def table(self, length):
+      """Returns the WordTable of the dictionary's words of length. The first
+      time, builds it (from the dictionary file or snapshot), and pins its
+      initial and pre-seeded WordSets into the cache."""
+
+      if length in self.tables:
+         return self.tables[length]
+
+      if self.snapshot != None and length in self.snapshot.directory:
+         self.loadSnapshot(length)
+         return self.tables[length]
+
+      if self.base != None:
+         table = self.base.table(length) # shared, but the cache is our own
+      else:
+         # not in the dictionary gets an empty table, so nothing matches
+         table = WordTable(self.buckets.pop(length, ()))
+      self.tables[length] = table
+      everything = self.wordSetType()
+      everything.narrow(table, table.everything)
+      self.wordCache.pin(self.rootKey(length), everything)
+      self.seedCache(length)
+
+      return table
+
+
+   #-----------------------------------------------------------------------------
+   # Edit the dictionary
+   #-----------------------------------------------------------------------------
+   def addWords(self, words):
+      """Adds words to the dictionary, without reloading it. See editWords().
+      return - how many were added (ones in it already don't count)
+      exception - ValueError if a word isn't A-Z, or this strategy shares
+      another's tables"""
+
+      return self.editWords(words, True)
+
+   def removeWords(self, words):
+      """Removes words from the dictionary, without reloading it. See
+      editWords().
+      return - how many were removed (ones not in it don't count)
+      exception - ValueError if a word isn't A-Z, or this strategy shares
+      another's tables"""
+
+      return self.editWords(words, False)
+
+
+   #-----------------------------------------------------------------------------
+   # Edit the dictionary
+   #-----------------------------------------------------------------------------
+   def editWords(self, words, add):
+      """Adds (or removes) words to (from) the dictionary in place. Lengths
+      whose table isn't built yet just have their list of words changed. Built
+      tables have them added to (or taken out of) their index, and only the
+      cached game states the words match are dropped (or, if pinned,
+      narrowed down again); the rest of the cache stays. The disk cache, if
+      any, is for the dictionary as it was loaded, so it's let go of.
+      return - how many words were actually added (removed)
+      exception - ValueError if a word isn't A-Z, or this strategy shares
+      another's tables (edit that one instead)"""
+
+      if self.base != None:
+         raise ValueError("this strategy shares its dictionary's tables; "
+                          "edit the one it shares them with")
+
+      # all of them checked before anything's changed
+      byLength = {}
+      for word in words:
+         word = word.upper()
+         if not word or not set(word).issubset(LETTERS):
+            raise ValueError("%r is not an A-Z word" % word)
+         byLength.setdefault(len(word), set()).add(word)
+
+      numChanged = 0
+      for length, lengthWords in sorted(byLength.items()):
+         if length not in self.tables and length in self.buckets:
+            # not built yet, so it'll be built with the change
+            bucket = self.buckets[length]
+            changed = (lengthWords - set(bucket) if add
+                       else lengthWords.intersection(bucket))
+            if add:
+               bucket.extend(sorted(changed))
+            else:
+               bucket[:] = [word for word in bucket if word not in changed]
+            numChanged += len(changed)
+            continue
+
+         table = self.table(length)
+         edit = table.add if add else table.remove
+         changed = [word for word in sorted(lengthWords) if edit(word) != None]
+         if changed:
+            self.invalidate(length, changed)
+            numChanged += len(changed)
+
+      if numChanged and self.diskCache != None:
+         self.diskCache = None
+         self.wordCache.spill = None
+      return numChanged
+
+
+   #-----------------------------------------------------------------------------
+   # Forget cached states
+   #-----------------------------------------------------------------------------
+   def invalidate(self, length, words):
+      """Drops the cached game states of length that any of words (just added
+      to or removed from its table) match, since they're out of date. Pinned
+      ones (the root, seeded and warmed states) are narrowed down again
+      instead, the root first, since the others are narrowed from it."""
+
+      table = self.tables[length]
+      root = self.rootKey(length)
+      everything = self.wordSetType()
+      everything.narrow(table, table.everything)
+      self.wordCache.pin(root, everything)
+
+      for key in list(self.wordCache):
+         if key == root or key.index('!') != length:
+            continue
+         pattern, wrongLetters = self.unkey(key)
+         if any(matches(word, pattern, wrongLetters) for word in words):
+            if key in self.wordCache.pinned:
+               self.wordCache.pin(key, self.seeded(key))
+            else:
+               self.wordCache.discard(key)
+
+      # narrowing the current game down from its last state would miss them
+      if self.possibleKey != None and self.possibleKey.index('!') == length:
+         self.possibleKey = None
+
+
+   #-----------------------------------------------------------------------------
+   # Build up front
+   #-----------------------------------------------------------------------------
+   def preload(self, lengths=None):
+      """Builds the tables for lengths (default all of the dictionary's) now
+      instead of on demand."""
 
-      # Everything read in. Generate the WordSets' letter freqs.
-      for k in self.wordCache:
-         self.wordCache[k].updated()
+      for length in (lengths if lengths != None else self.lengths()):
+         self.table(length)
+
+
+   #-----------------------------------------------------------------------------
+   # Read compiled dictionary
+   #-----------------------------------------------------------------------------
+   def loadSnapshot(self, length):
+      """Loads a length's table, its letter freqs, and its seeded cache from
+      the DictionarySnapshot instead of building them and seedCache()."""
+
+      table = self.snapshot.table(length)
+      self.tables[length] = table
+
+      everything = self.wordSetType()
+      everything.narrow(table, table.everything,
+                        self.snapshot.letterFreq(length))
+      self.wordCache.pin(self.rootKey(length), everything)
+
+      seed = self.snapshot.seed(length)
+      if seed != None:
+         letter, bits, letterFreq = seed
+         noLetter = self.wordSetType()
+         noLetter.narrow(table, bits, letterFreq)
+         self.wordCache.pin(self.rootKey(length) + letter, noLetter)
+         self.seedLetters[length] = letter
 
 
    #-----------------------------------------------------------------------------
    # seed cache
    #-----------------------------------------------------------------------------
-   def seedCache(self):
-      """Pre-compute misses for common letters."""
+   def seedCache(self, length):
+      """Pre-compute misses for the first guess letter, for words of length."""
+
+      k = self.rootKey(length)
+      # don't bother for the sets that are tiny
+      if len(self.wordCache[k]) > self.SEED_MIN:
+         # determine first guess letter, the same as the games' will be
+         letter = self.letterStrategy(self.wordCache[k], set(),
+                                      self.maxWrongGuesses)
 
-      emptySet = set() # used to get letterStrategy's first guess
-      temp = self.wordCache.copy() # can't add to what we're iterating over, so temp
-      for k in temp:
-         # don't bother for the sets that are tiny
-         if len(self.wordCache[k]) > self.SEED_MIN:
-            # determine first guess letter
-            letter = self.letterStrategy(self.wordCache[k], emptySet, 1000)
+         # weed down to just failures, and save to cache with new key
+         key = k + letter
+         self.wordCache.pin(key, self.seeded(key))
+         self.seedLetters[length] = letter
+         util.DBG("pre-cached: " + key, DEBUG)
 
-            # weed down to just failures
-            noLetter = self.wordCache[k].copy()
-            for word in self.wordCache[k].words:
-               if letter in word:
-                  noLetter.words.remove(word)
-            noLetter.updated()
 
-            # save to cache with new key
-            key = HangmanGame.MYSTERY_LETTER * len(word) + "!" + letter
-            self.wordCache[key] = noLetter
-            util.DBG("pre-cached: " + key, DEBUG)
+   #-----------------------------------------------------------------------------
+   # Pre-compute a state
+   #-----------------------------------------------------------------------------
+   def seeded(self, key):
+      """Looks up the words of the game state with cache key key, narrowed
+      down from all the words of its length, into a new WordSet. Like
+      narrowed(), doesn't change self or the cache, so it can run on another
+      thread once the length's table() is loaded.
+      return - the new WordSet"""
+
+      pattern, wrongLetters = self.unkey(key)
+      root = self.rootKey(len(pattern))
+      return self.narrowed(pattern, wrongLetters, self.wordCache.get(root), root)
+
+
+   #-----------------------------------------------------------------------------
+   # Warm up
+   #-----------------------------------------------------------------------------
+   def warm(self, keys, background=False):
+      """Pins the game states with cache keys keys (e.g. a StateTrace's top()
+      ones) into the cache, same as seedCache()'s, so games that get to them
+      never miss. Their lengths' tables are loaded first, here.
+      background - look them up on a thread instead, so games can start
+      straight away. Each is pinned by the first newGame() (or pinWarmed())
+      after it's done; until then, games that get to it miss as usual.
+      return - the thread, if background, else None"""
+
+      keys = [key for key in keys if key not in self.wordCache.pinned]
+      for length in sorted(set(key.index('!') for key in keys)):
+         self.table(length)
+
+      if not background:
+         for key in keys:
+            if key not in self.wordCache.pinned: # e.g. a seeded one
+               self.wordCache.pin(key, self.seeded(key))
+         return None
+
+      self.warmQueue = queue.SimpleQueue()
+      thread = threading.Thread(target=self.warmUp,
+                                args=(keys, self.warmQueue), daemon=True)
+      thread.start()
+      return thread
+
+
+   #-----------------------------------------------------------------------------
+   # Warm up, on a thread
+   #-----------------------------------------------------------------------------
+   def warmUp(self, keys, results):
+      """Looks up the game states with cache keys keys for a background
+      warm(), putting (key, WordSet) on queue results as each is done, then
+      (None, None)."""
+
+      try:
+         for key in keys:
+            results.put((key, self.seeded(key)))
+      finally:
+         results.put((None, None))
+
+
+   #-----------------------------------------------------------------------------
+   # Finish warming up
+   #-----------------------------------------------------------------------------
+   def pinWarmed(self):
+      """Pins the states a background warm() has looked up since last time
+      into the cache. Cheap if there aren't any."""
 
+      while self.warmQueue != None and not self.warmQueue.empty():
+         key, wordSet = self.warmQueue.get_nowait()
+         if key == None:
+            self.warmQueue = None # all done
+         elif key not in self.wordCache.pinned:
+            self.wordCache.pin(key, wordSet)
 
 
 
@@ -258,6 +864,7 @@ class FrequencyStrategy:
 #===============================================================================
 if __name__ == '__main__':
    strat = FrequencyStrategy("words.txt")
-   print("aa" in strat.wordCache)
+   strat.table(2)
+   print("--!" in strat.wordCache)
 
 # Fin
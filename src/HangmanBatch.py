@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import collections
+from array import array
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from HangmanGame import HangmanGame
+   from GuessWord import GuessWord
+else:
+   from src.HangmanGame import HangmanGame
+   from src.GuessWord import GuessWord
+
+# CONSTANTS
+NO_WORDS = frozenset()
+
+#-------------------------------------------------------------------------------
+# Letter masks
+#-------------------------------------------------------------------------------
+def letterBit(letter):
+   """return - letter's bit in a letter mask (A is bit 0)
+   exception - AssertionError if letter isn't A-Z"""
+
+   assert 'A' <= letter <= 'Z' and len(letter) == 1, "%r is not a letter" % letter
+   return 1 << (ord(letter) - ord('A'))
+
+def lettersOf(mask):
+   """return - frozenset of the letters in letter mask"""
+
+   return frozenset(chr(ord('A') + i) for i in range(26) if mask & (1 << i))
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class HangmanBatch:
+   """Lots of games of Hangman at once, for bulk simulation. Instead of a
+   HangmanGame object each, the games' state is held in parallel arrays (one
+   slot per game): their guessed-so-far patterns, how many letters each still
+   has hidden, letter masks of their right and wrong letter guesses, and
+   counts of their wrong guesses and of all guesses.
+
+   Guesses are made by game index, a letter for a whole list of games at a
+   time if need be, and the rules (and scores) are the same as HangmanGame's.
+   Guessed letters have to be A-Z."""
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, secretWords, maxWrongGuesses):
+      """Initializer.
+      secretWords - the words that need to be guessed, one game each
+      maxWrongGuesses - The maximum number of incorrect word/letter guesses that
+      are allowed in each game"""
+
+      self.secretWords = [word.upper() for word in secretWords]
+      self.maxWrongGuesses = maxWrongGuesses
+
+      n = len(self.secretWords)
+      self.guessedSoFar = [HangmanGame.MYSTERY_LETTER * len(word)
+                           for word in self.secretWords]
+      self.hidden = array('L', (len(word) -
+                                word.count(HangmanGame.MYSTERY_LETTER)
+                                for word in self.secretWords))
+      self.correctLetters = array('L', [0]) * n
+      self.wrongLetters = array('L', [0]) * n
+      self.wrongWords = [NO_WORDS] * n
+      self.numWrong = array('L', [0]) * n
+      self.numGuesses = array('L', [0]) * n
+
+
+   #-----------------------------------------------------------------------------
+   # len(HangmanBatch)
+   #-----------------------------------------------------------------------------
+   def __len__(self):
+      """HangmanBatch's length is its number of games."""
+
+      return len(self.secretWords)
+
+
+   #-----------------------------------------------------------------------------
+   # Guess a letter, in some games
+   #-----------------------------------------------------------------------------
+   def guessLetter(self, games, ch):
+      """Guess the specified letter in each of the games (indices), and update
+      their state accordingly.
+      exception - AssertionError if any of them can't keep guessing"""
+
+      ch = ch.upper()
+      bit = letterBit(ch)
+      for i in games:
+         self.assertCanKeepGuessing(i)
+         self.numGuesses[i] += 1
+         word = self.secretWords[i]
+         if ch not in word:
+            if not self.wrongLetters[i] & bit:
+               self.wrongLetters[i] |= bit
+               self.numWrong[i] += 1
+         elif not self.correctLetters[i] & bit:
+            self.correctLetters[i] |= bit
+            self.hidden[i] -= word.count(ch)
+            self.guessedSoFar[i] = "".join([
+               letter if letter == ch else shown
+               for letter, shown in zip(word, self.guessedSoFar[i])])
+
+
+   #-----------------------------------------------------------------------------
+   # Guess a word, in some games
+   #-----------------------------------------------------------------------------
+   def guessWord(self, games, guess):
+      """Guess the specified word in each of the games (indices), and update
+      their state accordingly.
+      exception - AssertionError if any of them can't keep guessing"""
+
+      guess = guess.upper()
+      for i in games:
+         self.assertCanKeepGuessing(i)
+         self.numGuesses[i] += 1
+         if guess == self.secretWords[i]:
+            self.guessedSoFar[i] = guess
+            self.hidden[i] = 0
+         elif guess not in self.wrongWords[i]:
+            self.wrongWords[i] = self.wrongWords[i] | {guess}
+            self.numWrong[i] += 1
+
+
+   #-----------------------------------------------------------------------------
+   # Game's current state
+   #-----------------------------------------------------------------------------
+   def gameStatus(self, i):
+      """return - The current game status of game i"""
+      if not self.hidden[i]:
+         return HangmanGame.GAME_WON
+      elif self.numWrong[i] > self.maxWrongGuesses:
+         return HangmanGame.GAME_LOST
+      else:
+         return HangmanGame.KEEP_GUESSING
+
+
+   #-----------------------------------------------------------------------------
+   # current game score
+   #-----------------------------------------------------------------------------
+   def currentScore(self, i):
+      """return - The score for game i's current state"""
+      if self.gameStatus(i) == HangmanGame.GAME_LOST:
+         return 25
+      return self.numWrong[i] + bin(self.correctLetters[i]).count('1')
+
+
+   #-----------------------------------------------------------------------------
+   # Exceptions!
+   #-----------------------------------------------------------------------------
+   def assertCanKeepGuessing(self, i):
+      """Throws AssertionError if game i's not allowed to keep guessing"""
+      assert self.gameStatus(i) == HangmanGame.KEEP_GUESSING, \
+             "More guesses not allowed!"
+
+
+   #-----------------------------------------------------------------------------
+   # Games still going
+   #-----------------------------------------------------------------------------
+   def active(self):
+      """return - list of the indices of the games still being played"""
+
+      maxWrong = self.maxWrongGuesses
+      return [i for i, (hidden, numWrong) in enumerate(zip(self.hidden,
+                                                           self.numWrong))
+              if hidden and numWrong <= maxWrong]
+
+
+   #-----------------------------------------------------------------------------
+   # One game, as a HangmanGame
+   #-----------------------------------------------------------------------------
+   def game(self, i):
+      """return - new HangmanGame in the same state as game i, e.g. to ask a
+      strategy for its next guess"""
+
+      game = HangmanGame(self.secretWords[i], self.maxWrongGuesses)
+      game.guessedSoFar = self.guessedSoFar[i]
+      game.hidden = self.hidden[i]
+      game.correctlyGuessedLetters = lettersOf(self.correctLetters[i])
+      game.incorrectlyGuessedLetters = lettersOf(self.wrongLetters[i])
+      game.incorrectlyGuessedWords = self.wrongWords[i]
+      return game
+
+
+   #-----------------------------------------------------------------------------
+   # Play them all
+   #-----------------------------------------------------------------------------
+   def play(self, strategy):
+      """Plays every game to the end in rounds of one guess each. In each
+      round, games in the same state get one guess between them, so strategy
+      is only asked once per state. So it has to pick its guesses from the game
+      state alone (e.g. FrequencyStrategy does, TreeStrategy doesn't).
+      return - list of (score, number of guesses made), one per game"""
+
+      games = self.active()
+      while games:
+         states = collections.defaultdict(list)
+         for i in games:
+            states[(self.guessedSoFar[i], self.wrongLetters[i],
+                    self.wrongWords[i])].append(i)
+
+         for group in states.values():
+            guess = strategy.nextGuess(self.game(group[0]))
+            if isinstance(guess, GuessWord):
+               self.guessWord(group, guess.guess)
+            else:
+               self.guessLetter(group, guess.guess)
+
+         games = [i for i in games
+                  if self.gameStatus(i) == HangmanGame.KEEP_GUESSING]
+
+      return [(self.currentScore(i), self.numGuesses[i])
+              for i in range(len(self))]
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   # same guesses as HangmanGame's quick test, in two games at once
+   batch = HangmanBatch(["factual", "natural"], 4)
+   both = [0, 1]
+   batch.guessLetter(both, 'a')
+   batch.guessWord(both, "natural")
+   batch.guessLetter([0], 'x')
+   batch.guessLetter([0], 'u')
+   batch.guessLetter([0], 'l')
+   batch.guessWord([0], "factual")
+   for i in both:
+      print(batch.game(i), batch.numGuesses[i])
+
+# Fin
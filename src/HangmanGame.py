@@ -5,7 +5,18 @@
 # CLASS
 #===============================================================================
 class HangmanGame:
-   """Contains all state for the game of Hangman."""
+   """Contains all state for the game of Hangman.
+
+   Built for playing lots of games: where the secret word's letters are is
+   worked out once up front, the number of letters still hidden is kept up to
+   date so the game's status is O(1), and the guessed letter/word sets are
+   frozensets that are replaced rather than changed, so the getters hand them
+   out as they are instead of copying them."""
+
+   __slots__ = ("secretWord", "guessedSoFar", "maxWrongGuesses",
+                "correctlyGuessedLetters", "incorrectlyGuessedLetters",
+                "incorrectlyGuessedWords", "positions", "hidden")
+
    #-----------------------------------------------------------------------------
    # CLASS CONSTANTS
    #-----------------------------------------------------------------------------
@@ -32,20 +43,50 @@ class HangmanGame:
 
       # The letters guessed so far (unknown letters will be marked by the
       # MYSTERY_LETTER constant). For example, 'F-CTU-L'
-      self.guessedSoFar = list(self.MYSTERY_LETTER * len(self.secretWord))
+      self.guessedSoFar = self.MYSTERY_LETTER * len(self.secretWord)
+
+      # letter -> tuple of the positions it's at in the secret word
+      positions = {}
+      for i, letter in enumerate(self.secretWord):
+         positions.setdefault(letter, []).append(i)
+      self.positions = {letter: tuple(at) for letter, at in positions.items()}
+
+      # Number of the secret word's letters not shown in guessedSoFar yet. The
+      # game's won at 0. (A MYSTERY_LETTER in the secret word already looks
+      # guessed.)
+      self.hidden = len(self.secretWord) - \
+                    len(self.positions.get(self.MYSTERY_LETTER, ()))
 
       # The maximum number of wrong letter/word guesses that are allowed
       # (e.g. 6, and if you exceed 6 then you lose)
       self.maxWrongGuesses = maxWrongGuesses
 
       # Set of all correct letter guesses so far (e.g. 'C', 'F', 'L', 'T', 'U')
-      self.correctlyGuessedLetters = set()
+      self.correctlyGuessedLetters = frozenset()
 
       # Set of all incorrect letter guesses so far (e.g. 'R', 'S')
-      self.incorrectlyGuessedLetters = set()
+      self.incorrectlyGuessedLetters = frozenset()
 
       # Set of all incorrect word guesses so far (e.g. 'FACTORS')
-      self.incorrectlyGuessedWords = set()
+      self.incorrectlyGuessedWords = frozenset()
+
+
+   #-----------------------------------------------------------------------------
+   # Same game, different word
+   #-----------------------------------------------------------------------------
+   def branch(self, secretWord):
+      """return - new HangmanGame for secretWord, with the same guesses made as
+      this one. secretWord must look the same as this game's secret word given
+      those guesses (i.e. same guessedSoFar), e.g. because they were both
+      candidates for it."""
+      retVal = HangmanGame(secretWord, self.maxWrongGuesses)
+      retVal.guessedSoFar = self.guessedSoFar
+      retVal.hidden = self.guessedSoFar.count(self.MYSTERY_LETTER) - \
+                      len(retVal.positions.get(self.MYSTERY_LETTER, ()))
+      retVal.correctlyGuessedLetters = self.correctlyGuessedLetters
+      retVal.incorrectlyGuessedLetters = self.incorrectlyGuessedLetters
+      retVal.incorrectlyGuessedWords = self.incorrectlyGuessedWords
+      return retVal
 
 
    #-----------------------------------------------------------------------------
@@ -62,18 +103,20 @@ class HangmanGame:
       assert type(ch) is str, "%r is not a string" % ch
       assert len(ch) == 1, "%r is not a single character" % ch
 
-      # update the guessedSoFar buffer with the new character
-      goodGuess = False
-      for i in range(len(self.secretWord)):
-         if self.secretWord[i] == ch:
-            self.guessedSoFar[i] = ch
-            goodGuess = True
+      # update guessedSoFar with the new character, wherever it is
+      positions = self.positions.get(ch)
+      if positions and self.guessedSoFar[positions[0]] != ch:
+         soFar = list(self.guessedSoFar)
+         for i in positions:
+            soFar[i] = ch
+         self.guessedSoFar = "".join(soFar)
+         self.hidden -= len(positions)
 
       # update the proper set of guessed letters
-      if goodGuess:
-          self.correctlyGuessedLetters.add(ch)
+      if positions:
+          self.correctlyGuessedLetters = self.correctlyGuessedLetters | {ch}
       else:
-          self.incorrectlyGuessedLetters.add(ch)
+          self.incorrectlyGuessedLetters = self.incorrectlyGuessedLetters | {ch}
 
       return self.getGuessedSoFar()
 
@@ -90,9 +133,10 @@ class HangmanGame:
 
       if guess == self.secretWord:
          # if the guess is correct, then set guessedSoFar to the secret word
-         self.guessedSoFar = list(self.secretWord)
+         self.guessedSoFar = self.secretWord
+         self.hidden = 0
       else:
-         self.incorrectlyGuessedWords.add(guess)
+         self.incorrectlyGuessedWords = self.incorrectlyGuessedWords | {guess}
 
       return self.getGuessedSoFar()
 
@@ -121,7 +165,7 @@ class HangmanGame:
    #-----------------------------------------------------------------------------
    def gameStatus(self):
       """return - The current game status"""
-      if self.secretWord == self.getGuessedSoFar():
+      if not self.hidden:
          return self.GAME_WON
       elif self.numWrongGuessesMade() > self.maxWrongGuesses:
          return self.GAME_LOST
@@ -142,7 +186,7 @@ class HangmanGame:
    #-----------------------------------------------------------------------------
    def numWrongGuessesRemaining(self):
       """return - Number of wrong guesses still allowed"""
-      return self.getMaxWrongGuesses() - self.numWrongGuessesMade()
+      return self.maxWrongGuesses - self.numWrongGuessesMade()
 
 
    #-----------------------------------------------------------------------------
@@ -159,29 +203,29 @@ class HangmanGame:
    def getGuessedSoFar(self):
       """return - The string representation of the current game state
       (which will contain MYSTERY_LETTER in place of unknown letters)"""
-      return "".join(self.guessedSoFar)
+      return self.guessedSoFar
 
 
    #-----------------------------------------------------------------------------
    # Correct Letter Guesses
    #-----------------------------------------------------------------------------
    def getCorrectlyGuessedLetters(self):
-      """return - Set of all correctly guessed letters so far"""
-      return set(self.correctlyGuessedLetters)
+      """return - Set (frozen) of all correctly guessed letters so far"""
+      return self.correctlyGuessedLetters
 
 
    #-----------------------------------------------------------------------------
    # Incorrect Letter Guesses
    #-----------------------------------------------------------------------------
    def getIncorrectlyGuessedLetters(self):
-      """return - Set of all incorrectly guessed letters so far"""
-      return set(self.incorrectlyGuessedLetters)
+      """return - Set (frozen) of all incorrectly guessed letters so far"""
+      return self.incorrectlyGuessedLetters
 
    #-----------------------------------------------------------------------------
    # All Letter Guesses
    #-----------------------------------------------------------------------------
    def getAllGuessedLetters(self):
-      """return - Set of all guessed letters so far"""
+      """return - Set (frozen) of all guessed letters so far"""
       return self.correctlyGuessedLetters | self.incorrectlyGuessedLetters
 
 
@@ -189,8 +233,8 @@ class HangmanGame:
    # All Incorrect Word Guesses
    #-----------------------------------------------------------------------------
    def getIncorrectlyGuessedWords(self):
-      """return - Set of all incorrectly guessed words so far"""
-      return set(self.incorrectlyGuessedWords)
+      """return - Set (frozen) of all incorrectly guessed words so far"""
+      return self.incorrectlyGuessedWords
 
 
    #-----------------------------------------------------------------------------
@@ -208,9 +252,10 @@ class HangmanGame:
       """HangmanGame's representation as a string"""
 
       status = "KEEP_GUESSING"
-      if self.gameStatus() == self.GAME_LOST:
+      gameStatus = self.gameStatus()
+      if gameStatus == self.GAME_LOST:
           status = "GAME_LOST"
-      elif self.gameStatus() == self.GAME_WON:
+      elif gameStatus == self.GAME_WON:
           status = "GAME_WON"
 
       return self.getGuessedSoFar() + "; score=" + str(self.currentScore()) + "; status=" + status
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import json
+import asyncio
+import itertools
+import concurrent.futures
+
+# local imports
+if __name__ == '__main__':
+   from HangmanGame import HangmanGame
+   from FrequencyStrategy import FrequencyStrategy
+   from CacheStats import CacheStats
+   from WordTable import LETTERS
+   import util
+else:
+   from src.HangmanGame import HangmanGame
+   from src.FrequencyStrategy import FrequencyStrategy
+   from src.CacheStats import CacheStats
+   from src.WordTable import LETTERS
+   from src import util
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class Session:
+   """One hosted game, and its possible words as of its last guess"""
+
+   def __init__(self, game):
+      self.game = game
+      self.possible = None # a shared, cached WordSet. Don't change it.
+      self.possibleKey = None # its cache key
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class HangmanServer:
+   """Hosts many concurrent Hangman games on asyncio, all guessed by one shared
+   FrequencyStrategy, so the dictionary is loaded and the cache warmed once for
+   all of them instead of once per hangman.py run.
+
+   Speaks JSON lines over TCP: one request object per line, one response
+   object per line, in order. Requests:
+     {"op": "new", "word": W, "guesses": N}  -> {"session": ID, "state": "---"}
+     {"op": "guess", "session": ID}          -> {"guess": G, "state": ...,
+                                                 "score": S, "status": ...}
+     {"op": "play", "word": W, "guesses": N} -> {"score": S, "guesses": [G...]}
+     {"op": "end", "session": ID}            -> {"session": ID}
+   and anything wrong gets {"error": "..."}. Sessions a connection didn't end
+   are ended when it closes.
+
+   Cache hits are answered straight away on the event loop. Cache misses (the
+   index lookups, which can be slow for long words early in a game) run on a
+   single-thread executor, and sessions that miss on the same game state at
+   the same time share one lookup."""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   # HangmanGame.gameStatus() -> name for responses
+   STATUSES = {HangmanGame.GAME_WON:      "GAME_WON",
+               HangmanGame.GAME_LOST:     "GAME_LOST",
+               HangmanGame.KEEP_GUESSING: "KEEP_GUESSING"}
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, strategy, executor=None):
+      """Initialize HangmanServer with no sessions.
+      strategy - a loaded FrequencyStrategy, shared by every session
+      executor - concurrent.futures executor to look up cache misses on.
+      Default is one thread, so lookups never run at the same time as each
+      other."""
+
+      self.strategy = strategy
+      if executor == None:
+         executor = concurrent.futures.ThreadPoolExecutor(1)
+      self.executor = executor
+
+      self.sessions = {}
+      self.sessionIds = itertools.count(1)
+
+      # cache key -> future of the WordSet being looked up for it
+      self.pending = {}
+
+
+   #-----------------------------------------------------------------------------
+   # pick a guess
+   #-----------------------------------------------------------------------------
+   async def nextGuess(self, session):
+      """Asks the strategy for session's next guess, without blocking the
+      event loop on a cache miss.
+      return - the GuessWord/GuessLetter"""
+
+      strategy = self.strategy
+      game = session.game
+      length = game.getSecretWordLength()
+      if length not in strategy.tables:
+         strategy.table(length) # first game of this length
+      strategy.pinWarmed()
+
+      key = strategy.key(game)
+      if strategy.trace != None:
+         strategy.trace.record(key)
+      wordSet = strategy.wordCache.get(key)
+      if wordSet != None:
+         strategy.counted(key, length)
+      else:
+         future = self.pending.get(key)
+         if future == None:
+            strategy.cacheStats.count(CacheStats.MISSES, length)
+            future = asyncio.get_running_loop().run_in_executor(
+               self.executor, strategy.narrowed, game.getGuessedSoFar(),
+               set(game.getIncorrectlyGuessedLetters()), session.possible,
+               session.possibleKey)
+            self.pending[key] = future
+            try:
+               wordSet = await future
+               strategy.wordCache[key] = wordSet
+               strategy.cacheStats.count(CacheStats.INSERTIONS, length)
+            finally:
+               del self.pending[key]
+         else:
+            # another session's already narrowing it down
+            strategy.counted(key, length)
+            wordSet = await asyncio.shield(future)
+
+      session.possible = wordSet
+      session.possibleKey = key
+      return strategy.choose(game, wordSet)
+
+
+   #-----------------------------------------------------------------------------
+   # game state for responses
+   #-----------------------------------------------------------------------------
+   def state(self, game):
+      """return - dict of game's state for a response"""
+
+      return {"state": game.getGuessedSoFar(),
+              "score": game.currentScore(),
+              "status": self.STATUSES[game.gameStatus()]}
+
+
+   #-----------------------------------------------------------------------------
+   # a session's game
+   #-----------------------------------------------------------------------------
+   def session(self, request):
+      """return - the Session for request's "session"
+      exception - ValueError if there's no such session"""
+
+      session = self.sessions.get(request.get("session"))
+      if session == None:
+         raise ValueError("no session %r" % request.get("session"))
+      return session
+
+
+   #-----------------------------------------------------------------------------
+   # a new game
+   #-----------------------------------------------------------------------------
+   def newGame(self, request):
+      """return - new HangmanGame for request's "word" and "guesses"
+      exception - ValueError if the word isn't an A-Z string"""
+
+      word = request["word"]
+      if not isinstance(word, str) or not word or \
+         not set(word.upper()).issubset(LETTERS):
+         raise ValueError("word %r is not an A-Z string" % (word,))
+      return HangmanGame(word, int(request.get("guesses", 5)))
+
+
+   #-----------------------------------------------------------------------------
+   # a guess that can be made
+   #-----------------------------------------------------------------------------
+   async def guess(self, session):
+      """return - the strategy's next guess for session (see nextGuess())
+      exception - ValueError if it hasn't got one, i.e. no dictionary word
+      fits the game"""
+
+      guess = await self.nextGuess(session)
+      if guess.guess == None:
+         raise ValueError("no dictionary word fits %r" %
+                          session.game.getGuessedSoFar())
+      return guess
+
+
+   #-----------------------------------------------------------------------------
+   # answer a request
+   #-----------------------------------------------------------------------------
+   async def respond(self, request, opened=None):
+      """return - response dict for request dict
+      opened - set of the ids of the sessions the connection has open, kept
+      up to date if given
+      exception - ValueError/KeyError/TypeError/AssertionError for bad
+      requests"""
+
+      if opened == None:
+         opened = set()
+
+      op = request["op"]
+      if op == "new":
+         game = self.newGame(request)
+         sessionId = next(self.sessionIds)
+         self.sessions[sessionId] = Session(game)
+         opened.add(sessionId)
+         return {"session": sessionId, "state": game.getGuessedSoFar()}
+
+      elif op == "guess":
+         session = self.session(request)
+         session.game.assertCanKeepGuessing()
+         guess = await self.guess(session)
+         guess.makeGuess(session.game)
+         response = {"guess": guess.guess}
+         response.update(self.state(session.game))
+         return response
+
+      elif op == "play":
+         session = Session(self.newGame(request))
+         guesses = []
+         while session.game.gameStatus() == HangmanGame.KEEP_GUESSING:
+            guess = await self.guess(session)
+            guess.makeGuess(session.game)
+            guesses.append(guess.guess)
+         response = {"guesses": guesses}
+         response.update(self.state(session.game))
+         return response
+
+      elif op == "end":
+         self.session(request) # it has to be there
+         del self.sessions[request["session"]]
+         opened.discard(request["session"])
+         return {"session": request["session"]}
+
+      raise ValueError("unknown op %r" % op)
+
+
+   #-----------------------------------------------------------------------------
+   # one connection
+   #-----------------------------------------------------------------------------
+   async def handle(self, reader, writer):
+      """Answers a connection's requests, one line each, until it closes, then
+      ends the sessions it left open."""
+
+      opened = set()
+      try:
+         while True:
+            line = b""
+            try:
+               # ValueError if it's longer than the reader's limit
+               line = await reader.readline()
+               if not line:
+                  break
+               response = await self.respond(json.loads(line), opened)
+            except (ValueError, KeyError, TypeError, AssertionError) as err:
+               response = {"error": "%s: %s" % (type(err).__name__, err)}
+            except Exception as err:
+               # a request that trips over a bug still gets an answer, and
+               # doesn't take the connection (and its sessions) down with it
+               response = {"error": "internal error: %s: %s" %
+                                    (type(err).__name__, err)}
+            util.DBG("%s -> %s" % (line.strip(), response), DEBUG)
+            writer.write(json.dumps(response).encode('ascii') + b"\n")
+            await writer.drain()
+      except ConnectionError:
+         pass
+      finally:
+         # so clients that go away without ending them don't leave them behind
+         for sessionId in opened:
+            self.sessions.pop(sessionId, None)
+         writer.close()
+
+
+   #-----------------------------------------------------------------------------
+   # run
+   #-----------------------------------------------------------------------------
+   async def serve(self, host="127.0.0.1", port=8047):
+      """Serves connections on host:port forever."""
+
+      server = await asyncio.start_server(self.handle, host, port)
+      async with server:
+         await server.serve_forever()
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   async def main():
+      server = HangmanServer(FrequencyStrategy("words.txt"))
+      print(await server.respond({"op": "play", "word": "factual"}))
+   asyncio.run(main())
+
+# Fin
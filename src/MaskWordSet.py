@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import sys
+from array import array
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from WordTable import WordTable, bitsOf, laneCounts, laneTotal, popcount
+else:
+   from src.WordTable import WordTable, bitsOf, laneCounts, laneTotal, popcount
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class MaskWordSet:
+   """Compact WordSet. Holds a bitset of indices into a shared WordTable instead
+   of a set of strings, and counts letters from the table's precomputed
+   letter masks instead of from the words themselves.
+
+   Sparse sets (where an array of their ids is smaller than the bitset) hold the
+   id array instead. Either way, the members are never changed in place, only
+   replaced, so copies share them (copy-on-write) and copying is cheap. The
+   letter frequency is kept packed in lanes (see laneCounts()) and only
+   unpacked when asked for."""
+
+   __slots__ = ("table", "members", "count", "laneTotal", "freq")
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   # bits per id in a sparse set's id array
+   ID_BITS = 32
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, words=None):
+      """Initialize MaskWordSet with a new WordTable of the provided words. If
+      none provided, initialize with an empty table."""
+
+      if words == None:
+         words = ()
+      self.table = WordTable(words)
+      self.store(self.table.everything)
+      self.updated()
+
+
+   #-----------------------------------------------------------------------------
+   # game state -> words
+   #-----------------------------------------------------------------------------
+   @staticmethod
+   def match(table, pattern, wrongLetters):
+      """return - bitset of the words in WordTable table that match a game
+      state; see WordTable.match(). (Other engines, e.g. NumpyWordSet, find
+      them their own way.)"""
+
+      return table.match(pattern, wrongLetters)
+
+
+   #-----------------------------------------------------------------------------
+   # copy on write
+   #-----------------------------------------------------------------------------
+   def copy(self):
+      """Copy of this MaskWordSet, sharing its WordTable and members (they're
+      never changed in place). The letter frequency is unpacked again if the
+      copy needs it, so cached copies don't hold on to one."""
+      retVal = MaskWordSet.__new__(MaskWordSet)
+      retVal.table = self.table
+      retVal.members = self.members
+      retVal.count = self.count
+      retVal.laneTotal = self.laneTotal
+      retVal.freq = None
+      return retVal
+
+
+   #-----------------------------------------------------------------------------
+   # hold some words
+   #-----------------------------------------------------------------------------
+   def store(self, bits):
+      """Sets the members to bitset bits of the table: bits itself, or an array
+      of its ids if that's smaller."""
+
+      self.count = popcount(bits)
+      if self.count * self.ID_BITS < bits.bit_length():
+         self.members = array('I', self.table.ids(bits))
+      else:
+         self.members = bits
+
+
+   #-----------------------------------------------------------------------------
+   # the words, as a bitset
+   #-----------------------------------------------------------------------------
+   @property
+   def bits(self):
+      """Bitset of the ids of the words in this MaskWordSet."""
+
+      if isinstance(self.members, int):
+         return self.members
+      return bitsOf(self.members)
+
+
+   #-----------------------------------------------------------------------------
+   # held as ids?
+   #-----------------------------------------------------------------------------
+   @property
+   def sparse(self):
+      """True if the words are held as an id array, so bits has to build the
+      bitset from scratch"""
+
+      return not isinstance(self.members, int)
+
+
+   #-----------------------------------------------------------------------------
+   # the words, as ids
+   #-----------------------------------------------------------------------------
+   def ids(self):
+      """return - the ids of the words in this MaskWordSet, in order"""
+
+      if isinstance(self.members, int):
+         return self.table.ids(self.members)
+      return self.members
+
+
+   #-----------------------------------------------------------------------------
+   # the words, as strings
+   #-----------------------------------------------------------------------------
+   @property
+   def words(self):
+      """Set of the words in this MaskWordSet."""
+
+      return set(map(self.table.words.__getitem__, self.ids()))
+
+
+   #-----------------------------------------------------------------------------
+   # letter frequency
+   #-----------------------------------------------------------------------------
+   @property
+   def letterFreq(self):
+      """collections.Counter of the number of words each letter is in."""
+
+      if self.freq == None:
+         self.freq = laneCounts(self.laneTotal)
+      return self.freq
+
+
+   #-----------------------------------------------------------------------------
+   # remove words
+   #-----------------------------------------------------------------------------
+   def narrow(self, table, bits, letterFreq=None):
+      """Narrows this MaskWordSet down to the words in bitset bits of WordTable
+      table, and recounts their letters (see WordTable.laneSum(), which costs
+      about the same however many words were removed).
+      letterFreq - the new words' letter frequency, if it's already known"""
+
+      self.table = table
+      self.store(bits)
+      self.freq = None
+
+      if letterFreq != None:
+         self.laneTotal = laneTotal(letterFreq)
+         self.freq = letterFreq.copy()
+      else:
+         self.updated()
+
+
+   #-----------------------------------------------------------------------------
+   # words have been updated
+   #-----------------------------------------------------------------------------
+   def updated(self):
+      """Object's words have been updated, so redo the letter frequency count."""
+
+      self.laneTotal = self.table.laneSum(self.members)
+      self.freq = None
+
+
+   #-----------------------------------------------------------------------------
+   # len(MaskWordSet)
+   #-----------------------------------------------------------------------------
+   def __len__(self):
+      """MaskWordSet's length is its number of words."""
+
+      return self.count
+
+
+   #-----------------------------------------------------------------------------
+   # memory used
+   #-----------------------------------------------------------------------------
+   def sizeof(self):
+      """return - approximate bytes used by this object. The word table is
+      shared with the dictionary, so it doesn't count."""
+
+      retVal = (sys.getsizeof(self) + sys.getsizeof(self.members) +
+                sys.getsizeof(self.laneTotal))
+      if self.freq != None:
+         retVal += sys.getsizeof(self.freq)
+      return retVal
+
+
+   #-----------------------------------------------------------------------------
+   # print out function
+   #-----------------------------------------------------------------------------
+   def __str__(self):
+      """MaskWordSet's representation as a string"""
+
+      return str(self.words) + " " + str(self.letterFreq)
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   foo = MaskWordSet()
+   bar = MaskWordSet(set(["CAT", "HAT", "FAT"]))
+   print("Empty:", foo)
+   print("Not:  ", bar)
+
+   baz = bar.copy()
+   baz.narrow(baz.table, baz.table.match("-AT", set(["F"])))
+   print("2:", bar)
+   print("3:", baz)
+
+# Fin
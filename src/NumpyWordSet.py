@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import sys
+import weakref
+import collections
+
+try:
+   import numpy
+except ImportError:
+   numpy = None # NumpyWordSet is optional
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from WordTable import WordTable, LETTERS, LETTER_BITS, SPARSE_RATIO, popcount
+else:
+   from src.WordTable import WordTable, LETTERS, LETTER_BITS, SPARSE_RATIO, popcount
+
+# WordTable -> its (letters, presence) matrices, built on first use. Weak, so
+# they go when their table does.
+MATRICES = weakref.WeakKeyDictionary()
+
+#-------------------------------------------------------------------------------
+# Table as matrices
+#-------------------------------------------------------------------------------
+def matrices(table):
+   """return - (letters, presence) for WordTable table: an (n words x length)
+   uint8 matrix of the words' letters (A = 0), and an (n words x 26) bool
+   matrix of which letters each word has. Built again if words have been
+   added to the table since."""
+
+   if table not in MATRICES or len(MATRICES[table][0]) != len(table):
+      n = len(table)
+      letters = (numpy.frombuffer(table.data, dtype=numpy.uint8)
+                 .reshape(n, table.length) - ord('A'))
+      presence = numpy.zeros((n, len(LETTERS)), dtype=bool)
+      for position in range(table.length):
+         presence[numpy.arange(n), letters[:, position]] = True
+      MATRICES[table] = (letters, presence)
+   return MATRICES[table]
+
+
+#-------------------------------------------------------------------------------
+# bool mask <-> bitset
+#-------------------------------------------------------------------------------
+def maskBits(mask):
+   """return - bitset with bit i set where bool array mask is True"""
+   return int.from_bytes(numpy.packbits(mask, bitorder='little').tobytes(),
+                         'little')
+
+def bitsMask(bits, n):
+   """return - bool array of n, True where bitset bits has a bit set"""
+   data = numpy.frombuffer(bits.to_bytes((n + 7) // 8, 'little'),
+                           dtype=numpy.uint8)
+   return numpy.unpackbits(data, count=n, bitorder='little').view(bool)
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class NumpyWordSet:
+   """WordSet engine on NumPy. Each word length's WordTable is also kept as a
+   uint8 matrix of its words' letters and a bool matrix of which letters each
+   word has. A game state's words are found with broadcast comparisons against
+   those (see match()), and counting letters is a column sum of the matching
+   rows, instead of Python loops over the words.
+
+   Holds its words as a bitset over the table, the same as MaskWordSet, and
+   makes the same guesses. Copies share everything (it's never changed in
+   place). Only there if numpy is installed."""
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, words=None):
+      """Initialize NumpyWordSet with a new WordTable of the provided words. If
+      none provided, initialize with an empty table.
+      exception - ImportError if numpy isn't installed"""
+
+      if numpy == None:
+         raise ImportError("NumpyWordSet needs numpy, which isn't installed")
+
+      if words == None:
+         words = ()
+      self.table = WordTable(words)
+      self.bits = self.table.everything
+      self.count = len(self.table)
+      self.updated()
+
+
+   #-----------------------------------------------------------------------------
+   # game state -> words
+   #-----------------------------------------------------------------------------
+   @staticmethod
+   def match(table, pattern, wrongLetters):
+      """Same as WordTable.match(), with broadcast comparisons over the table's
+      matrices instead of its index.
+      return - bitset of the matching words' ids"""
+
+      if len(pattern) != table.length:
+         return 0
+
+      letters, presence = matrices(table)
+      known = [position for position, letter in enumerate(pattern)
+               if letter in LETTER_BITS]
+      codes = numpy.array([ord(pattern[position]) - ord('A')
+                           for position in known], dtype=numpy.uint8)
+      mask = (letters[:, known] == codes).all(axis=1)
+
+      wrong = [ord(letter) - ord('A') for letter in wrongLetters]
+      if wrong:
+         mask &= ~presence[:, wrong].any(axis=1)
+      bits = maskBits(mask)
+      if table.edited:
+         bits &= table.everything # not the words removed from it
+      return bits
+
+
+   #-----------------------------------------------------------------------------
+   # copy on write
+   #-----------------------------------------------------------------------------
+   def copy(self):
+      """Copy of this NumpyWordSet, sharing its members"""
+      retVal = NumpyWordSet.__new__(NumpyWordSet)
+      retVal.table = self.table
+      retVal.bits = self.bits
+      retVal.count = self.count
+      retVal.letterFreq = self.letterFreq
+      return retVal
+
+
+   #-----------------------------------------------------------------------------
+   # the words, as strings
+   #-----------------------------------------------------------------------------
+   @property
+   def words(self):
+      """Set of the words in this NumpyWordSet."""
+
+      return set(self.table.wordsIn(self.bits))
+
+
+   #-----------------------------------------------------------------------------
+   # remove words
+   #-----------------------------------------------------------------------------
+   def narrow(self, table, bits, letterFreq=None):
+      """Narrows this NumpyWordSet down to the words in bitset bits of
+      WordTable table, and recounts their letters.
+      letterFreq - the new words' letter frequency, if it's already known"""
+
+      self.table = table
+      self.bits = bits
+      self.count = popcount(bits)
+      if letterFreq != None:
+         self.letterFreq = letterFreq.copy()
+      else:
+         self.updated()
+
+
+   #-----------------------------------------------------------------------------
+   # words have been updated
+   #-----------------------------------------------------------------------------
+   def updated(self):
+      """Object's words have been updated, so redo the letter frequency count:
+      the number of matching rows with each letter."""
+
+      self.letterFreq = collections.Counter()
+      if self.count:
+         _, presence = matrices(self.table)
+         if self.count * SPARSE_RATIO < len(self.table):
+            # few rows: pick them by id instead of masking all of them
+            rows = numpy.array(self.table.ids(self.bits))
+         else:
+            rows = bitsMask(self.bits, len(self.table))
+         counts = presence[rows].sum(axis=0)
+         for i in numpy.flatnonzero(counts):
+            self.letterFreq[LETTERS[i]] = int(counts[i])
+
+
+   #-----------------------------------------------------------------------------
+   # len(NumpyWordSet)
+   #-----------------------------------------------------------------------------
+   def __len__(self):
+      """NumpyWordSet's length is its number of words."""
+
+      return self.count
+
+
+   #-----------------------------------------------------------------------------
+   # memory used
+   #-----------------------------------------------------------------------------
+   def sizeof(self):
+      """return - approximate bytes used by this object. The word table and its
+      matrices are shared with the dictionary, so they don't count."""
+
+      return sys.getsizeof(self.bits) + sys.getsizeof(self.letterFreq)
+
+
+   #-----------------------------------------------------------------------------
+   # print out function
+   #-----------------------------------------------------------------------------
+   def __str__(self):
+      """NumpyWordSet's representation as a string"""
+
+      return str(self.words) + " " + str(self.letterFreq)
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   bar = NumpyWordSet(set(["CAT", "HAT", "FAT"]))
+   print("Not:", bar)
+
+   baz = bar.copy()
+   baz.narrow(baz.table, NumpyWordSet.match(baz.table, "-AT", set(["F"])))
+   print("2:", bar)
+   print("3:", baz)
+
+# Fin
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import json
+import time
+import collections
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class SpanStats:
+   """Call count, total, and a histogram of the durations of one span. The
+   histogram buckets durations rounded down to their top BUCKET_BITS
+   significant bits, so it's small but percentiles are within 1/8th."""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   BUCKET_BITS = 4
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self):
+      """Initialize SpanStats with no calls"""
+
+      self.calls = 0
+      self.total = 0 # ns
+      self.min = None
+      self.max = 0
+      self.histogram = collections.Counter() # bucket ns -> calls
+
+
+   #-----------------------------------------------------------------------------
+   # add a duration
+   #-----------------------------------------------------------------------------
+   def add(self, elapsed):
+      """Records a call that took elapsed ns"""
+
+      self.calls += 1
+      self.total += elapsed
+      if self.min == None or elapsed < self.min:
+         self.min = elapsed
+      if elapsed > self.max:
+         self.max = elapsed
+      shift = max(elapsed.bit_length() - self.BUCKET_BITS, 0)
+      self.histogram[elapsed >> shift << shift] += 1
+
+
+   #-----------------------------------------------------------------------------
+   # combine
+   #-----------------------------------------------------------------------------
+   def merge(self, other):
+      """Adds other SpanStats' calls into these"""
+
+      self.calls += other.calls
+      self.total += other.total
+      if other.min != None and (self.min == None or other.min < self.min):
+         self.min = other.min
+      self.max = max(self.max, other.max)
+      self.histogram.update(other.histogram)
+
+
+   #-----------------------------------------------------------------------------
+   # percentile
+   #-----------------------------------------------------------------------------
+   def percentile(self, percent):
+      """return - approximate duration in ns that percent of calls took no
+      longer than"""
+
+      rank = percent / 100.0 * self.calls
+      seen = 0
+      for bucket in sorted(self.histogram):
+         seen += self.histogram[bucket]
+         if seen >= rank:
+            return bucket
+      return self.max
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class Span:
+   """One timing of a named span, for the with statement. See Profiler.span()"""
+
+   __slots__ = ("profiler", "name", "start")
+
+   def __init__(self, profiler, name):
+      self.profiler = profiler
+      self.name = name
+
+   def __enter__(self):
+      self.profiler.stack.append(self.name)
+      self.start = time.perf_counter_ns()
+      return self
+
+   def __exit__(self, *args):
+      elapsed = time.perf_counter_ns() - self.start
+      stack = self.profiler.stack
+      path = tuple(stack)
+      stack.pop()
+      stats = self.profiler.stats.get(path)
+      if stats == None:
+         stats = self.profiler.stats[path] = SpanStats()
+      stats.add(elapsed)
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class NullSpan:
+   """Span that does nothing, for when profiling is off"""
+
+   __slots__ = ()
+
+   def __enter__(self):
+      return self
+
+   def __exit__(self, *args):
+      pass
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class Profiler:
+   """Times named, nested spans of code with time.perf_counter_ns(). E.g.
+
+   with profiler.span("nextGuess"):
+      with profiler.span("match"):
+         ...
+
+   Each span is recorded under its path of enclosing spans (e.g. nextGuess >
+   match), with a SpanStats histogram of its durations. When disabled, span()
+   returns a shared do-nothing span, so leaving them in hot code is cheap."""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   # report columns
+   PERCENTILES = (50, 90, 99)
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, enabled=False):
+      """Initialize an empty Profiler"""
+
+      self.enabled = enabled
+      self.stack = []  # names of the spans currently open
+      self.stats = {}  # span path (tuple of names) -> SpanStats
+
+
+   #-----------------------------------------------------------------------------
+   # time a span
+   #-----------------------------------------------------------------------------
+   def span(self, name):
+      """return - context manager timing the code in it as span name, nested in
+      whichever spans are open"""
+
+      if not self.enabled:
+         return NULL_SPAN
+      return Span(self, name)
+
+
+   #-----------------------------------------------------------------------------
+   # forget
+   #-----------------------------------------------------------------------------
+   def reset(self):
+      """Drops everything recorded so far"""
+
+      self.stack = []
+      self.stats = {}
+
+
+   #-----------------------------------------------------------------------------
+   # combine
+   #-----------------------------------------------------------------------------
+   def merge(self, stats):
+      """Adds stats (another Profiler's stats, e.g. from a worker process) into
+      these"""
+
+      for path, other in stats.items():
+         if path not in self.stats:
+            self.stats[path] = SpanStats()
+         self.stats[path].merge(other)
+
+
+   #-----------------------------------------------------------------------------
+   # tree order
+   #-----------------------------------------------------------------------------
+   def ordered(self):
+      """return - span paths depth first, each span's children slowest first"""
+
+      children = collections.defaultdict(list)
+      for path in self.stats:
+         children[path[:-1]].append(path)
+
+      retVal = []
+      def visit(parent):
+         for path in sorted(children[parent],
+                            key=lambda path: -self.stats[path].total):
+            retVal.append(path)
+            visit(path)
+      visit(())
+      return retVal
+
+
+   #-----------------------------------------------------------------------------
+   # summary table
+   #-----------------------------------------------------------------------------
+   def table(self):
+      """return - string table of every span: calls, total time, share of its
+      parent's time, mean and percentile durations"""
+
+      header = "%-36s %9s %11s %7s %9s" % ("span", "calls", "total ms",
+                                            "%parent", "mean us")
+      header += "".join(" %9s" % ("p%d us" % percent)
+                        for percent in self.PERCENTILES)
+      lines = [header + " %9s" % "max us"]
+      for path in self.ordered():
+         stats = self.stats[path]
+         parent = self.stats.get(path[:-1])
+         share = "" if parent == None else "%6.1f%%" % (100.0 * stats.total /
+                                                        parent.total)
+         line = "%-36s %9d %11.3f %7s %9.1f" % ("  " * (len(path) - 1) + path[-1],
+                                                stats.calls, stats.total / 1e6,
+                                                share,
+                                                stats.total / 1e3 / stats.calls)
+         line += "".join(" %9.1f" % (stats.percentile(percent) / 1e3)
+                         for percent in self.PERCENTILES)
+         lines.append(line + " %9.1f" % (stats.max / 1e3))
+      return "\n".join(lines)
+
+
+   #-----------------------------------------------------------------------------
+   # summary JSON
+   #-----------------------------------------------------------------------------
+   def json(self):
+      """return - JSON string of every span's stats, including histograms"""
+
+      spans = []
+      for path in self.ordered():
+         stats = self.stats[path]
+         span = {"span": list(path), "calls": stats.calls,
+                 "total_ns": stats.total, "min_ns": stats.min,
+                 "max_ns": stats.max,
+                 "histogram_ns": {str(bucket): count for bucket, count
+                                  in sorted(stats.histogram.items())}}
+         for percent in self.PERCENTILES:
+            span["p%d_ns" % percent] = stats.percentile(percent)
+         spans.append(span)
+      return json.dumps({"spans": spans}, indent=2)
+
+
+# shared by everything, so spans nest across modules
+NULL_SPAN = NullSpan()
+profiler = Profiler()
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   profiler.enabled = True
+   for i in range(100):
+      with profiler.span("outer"):
+         with profiler.span("inner"):
+            time.sleep(0.0001)
+   print(profiler.table())
+
+# Fin
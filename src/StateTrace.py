@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import os
+import collections
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class StateTrace:
+   """Record of which game states (FrequencyStrategy.key()s) real games got
+   to, and how many times, to warm the cache with the most common ones next
+   time (see FrequencyStrategy.warm()).
+
+   Only the counts are kept, not the order, so it's as big as the number of
+   different states, however many games are recorded. It's saved as text, a
+   "count key" line per state, most common first. Loading, recording more
+   and saving again adds up the counts across runs."""
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, path=None):
+      """Initialize StateTrace with the counts saved in file path, if given
+      and it's there, otherwise with none.
+      exception - IOError if the file can't be read, ValueError if it isn't a
+      trace"""
+
+      self.counts = collections.Counter()
+      self.path = path
+      if path != None and os.path.exists(path):
+         self.load(path)
+
+
+   #-----------------------------------------------------------------------------
+   # record
+   #-----------------------------------------------------------------------------
+   def record(self, key, count=1):
+      """Counts count games (default 1) getting to the game state with cache
+      key key"""
+
+      self.counts[key] += count
+
+
+   #-----------------------------------------------------------------------------
+   # forget
+   #-----------------------------------------------------------------------------
+   def reset(self):
+      """Drops everything recorded so far"""
+
+      self.counts.clear()
+
+
+   #-----------------------------------------------------------------------------
+   # combine
+   #-----------------------------------------------------------------------------
+   def merge(self, other):
+      """Adds other StateTrace's counts (e.g. from a worker process) into
+      these"""
+
+      self.counts.update(other.counts)
+
+
+   #-----------------------------------------------------------------------------
+   # most common
+   #-----------------------------------------------------------------------------
+   def top(self, n=None):
+      """return - list of the n (default all) most common states' keys, most
+      common first"""
+
+      return [key for key, _ in self.counts.most_common(n)]
+
+
+   #-----------------------------------------------------------------------------
+   # read
+   #-----------------------------------------------------------------------------
+   def load(self, path):
+      """Adds the counts saved in file path into these.
+      exception - IOError if the file can't be read, ValueError if it isn't a
+      trace"""
+
+      with open(path, 'r') as trace:
+         for number, line in enumerate(trace, 1):
+            if not line.strip():
+               continue
+            count, _, key = line.strip().partition(" ")
+            if not count.isdigit() or '!' not in key:
+               raise ValueError("%s:%d: not a state trace line: %r" %
+                                (path, number, line.strip()))
+            self.counts[key] += int(count)
+
+
+   #-----------------------------------------------------------------------------
+   # write
+   #-----------------------------------------------------------------------------
+   def save(self, path=None):
+      """Writes the counts to file path (default the one they were loaded
+      from), replacing it. Written to a temporary file first, so a crash
+      doesn't lose the old one.
+      exception - IOError if the file can't be written"""
+
+      if path == None:
+         path = self.path
+      temporary = path + ".tmp"
+      with open(temporary, 'w') as trace:
+         for key, count in self.counts.most_common():
+            trace.write("%d %s\n" % (count, key))
+      os.replace(temporary, path)
+
+
+   #-----------------------------------------------------------------------------
+   # len(StateTrace)
+   #-----------------------------------------------------------------------------
+   def __len__(self):
+      """StateTrace's length is its number of different states."""
+
+      return len(self.counts)
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   trace = StateTrace()
+   for key in ["---!", "-A-!", "---!", "---!E", "-A-!"]:
+      trace.record(key)
+   trace.save("/tmp/trace.txt")
+   print(StateTrace("/tmp/trace.txt").top(2))
+
+# Fin
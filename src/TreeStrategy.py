@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+#
+
+# local imports
+if __name__ == '__main__':
+   from DecisionTree import DecisionTree, outcome
+   import util
+else:
+   from src.DecisionTree import DecisionTree, outcome
+   from src import util
+
+# CONSTANTS
+DEBUG  = False # true for Debug print outs
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class TreeStrategy:
+   """Guesses by walking a DecisionTree compiled ahead of time (see
+   buildtree.py), so no word filtering happens at all. Each guess is a lookup
+   of the last guess's outcome among the current node's children."""
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, filepath):
+      """Initialize TreeStrategy from a DecisionTree file.
+      exception - IOError/ValueError if the file can't be read"""
+
+      self.tree = DecisionTree.load(filepath)
+      self.newGame()
+
+
+   #-----------------------------------------------------------------------------
+   # pick a strategy
+   #-----------------------------------------------------------------------------
+   def nextGuess(self, game):
+      """Moves to the node for the game's current state and returns its
+      GuessWord/GuessLetter.
+      exception - ValueError if the game doesn't match the tree (e.g. different
+      max wrong guesses, or a secret word not in the tree's dictionary)"""
+
+      if game.getMaxWrongGuesses() != self.tree.maxWrongGuesses:
+         raise ValueError("decision tree is for %d max wrong guesses, not %d" %
+                          (self.tree.maxWrongGuesses, game.getMaxWrongGuesses()))
+
+      try:
+         if self.node == None:
+            self.node = self.tree.root(game.getSecretWordLength())
+         else:
+            # The game's still going, so a word guess missed, and a letter guess
+            # shows up in guessedSoFar wherever it's in the word.
+            self.node = self.tree.child(self.node,
+                                        outcome(self.lastGuess.guess,
+                                                game.getGuessedSoFar()))
+      except KeyError:
+         raise ValueError("game state %s is not in the decision tree" %
+                          game.getGuessedSoFar())
+
+      self.lastGuess = self.tree.guess(self.node)
+      util.DBG("GUESS: " + self.lastGuess.guess, DEBUG)
+      return self.lastGuess
+
+
+   #-----------------------------------------------------------------------------
+   # reset for new game
+   #-----------------------------------------------------------------------------
+   def newGame(self):
+      """Resets class variables to be ready for another game."""
+
+      self.node = None
+      self.lastGuess = None
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   strat = TreeStrategy("tree.bin")
+   print(len(strat.tree), "nodes")
+
+# Fin
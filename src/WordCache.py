@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import heapq
+import collections
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class WordCache:
+   """Cache of WordSets, keyed by game state (see FrequencyStrategy.key()).
+
+   Unbounded by default. Give it a budget (max entries and/or max bytes) and it
+   evicts entries according to its policy:
+     - LRU:  least recently used first
+     - SIZE: GreedyDual-Size, with an entry's size being the number of words it
+             holds. Big entries that haven't been used lately go first, small
+             ones stick around.
+
+   Pinned entries (e.g. per-length roots and seeded entries) are never evicted
+   and don't count against the budget.
+
+   Evicted entries can be spilled to a second tier (e.g. a DiskCache) by
+   setting spill."""
+
+   #---
+   # CLASS CONSTANTS
+   #---
+
+   # eviction policies
+   UNBOUNDED = "unbounded"
+   LRU       = "lru"
+   SIZE      = "size"
+   POLICIES  = (UNBOUNDED, LRU, SIZE)
+
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, policy=UNBOUNDED, maxEntries=None, maxBytes=None):
+      """Initialize WordCache.
+      policy - one of POLICIES
+      maxEntries - max number of (unpinned) entries, or None for no max
+      maxBytes - max approximate bytes of (unpinned) entries, or None for no max
+      exception - ValueError if policy is unknown, or evicts without a budget"""
+
+      if policy not in self.POLICIES:
+         raise ValueError("unknown cache policy: %r" % policy)
+      if policy != self.UNBOUNDED and maxEntries == None and maxBytes == None:
+         raise ValueError("cache policy %r needs a max entries or max bytes "
+                          "budget" % policy)
+      self.policy = policy
+      self.maxEntries = maxEntries
+      self.maxBytes = maxBytes
+
+      # entries that are never evicted
+      self.pinned = {}
+
+      # evictable entries, oldest first for LRU
+      self.entries = collections.OrderedDict()
+
+      # key -> approximate bytes of evictable entries
+      self.sizes = {}
+      self.totalBytes = 0
+
+      # called with (key, wordSet) for each entry as it's evicted, if set
+      self.spill = None
+
+      # number of entries evicted so far
+      self.evictions = 0
+
+      # GreedyDual-Size: inflation value, key -> priority, and a heap of
+      # (priority, key) with stale priorities skipped when popped (and
+      # compacted away once they outnumber the live ones)
+      self.inflation = 0.0
+      self.priority = {}
+      self.heap = []
+
+
+   #-----------------------------------------------------------------------------
+   # pin
+   #-----------------------------------------------------------------------------
+   def pin(self, key, wordSet):
+      """Saves wordSet to cache under key, never to be evicted."""
+
+      self.discard(key)
+      self.pinned[key] = wordSet
+
+
+   #-----------------------------------------------------------------------------
+   # get
+   #-----------------------------------------------------------------------------
+   def get(self, key, default=None):
+      """return - WordSet cached under key (and marks it used), or default"""
+
+      if key in self.pinned:
+         return self.pinned[key]
+
+      wordSet = self.entries.get(key)
+      if wordSet == None:
+         return default
+
+      if self.policy == self.LRU:
+         self.entries.move_to_end(key)
+      elif self.policy == self.SIZE:
+         self.prioritize(key, wordSet)
+      return wordSet
+
+
+   #-----------------------------------------------------------------------------
+   # put
+   #-----------------------------------------------------------------------------
+   def put(self, key, wordSet):
+      """Saves wordSet to cache under key, then evicts down to budget."""
+
+      if key in self.pinned:
+         self.pinned[key] = wordSet
+         return
+
+      self.discard(key)
+      self.entries[key] = wordSet
+      if self.maxBytes != None:
+         self.sizes[key] = wordSet.sizeof()
+         self.totalBytes += self.sizes[key]
+      if self.policy == self.SIZE:
+         self.prioritize(key, wordSet)
+
+      self.evict()
+
+
+   #-----------------------------------------------------------------------------
+   # discard
+   #-----------------------------------------------------------------------------
+   def discard(self, key):
+      """Removes key's (unpinned) entry, if there is one."""
+
+      if key in self.entries:
+         del self.entries[key]
+         self.totalBytes -= self.sizes.pop(key, 0)
+         self.priority.pop(key, None) # heap entry goes stale
+
+
+   #-----------------------------------------------------------------------------
+   # evict
+   #-----------------------------------------------------------------------------
+   def evict(self):
+      """Evicts entries until back within budget."""
+
+      if self.policy == self.UNBOUNDED:
+         return
+
+      while self.entries and self.overBudget():
+         if self.policy == self.LRU:
+            key = next(iter(self.entries))
+         else:
+            key = self.lowestPriority()
+         if self.spill != None:
+            self.spill(key, self.entries[key])
+         self.discard(key)
+         self.evictions += 1
+
+
+   #-----------------------------------------------------------------------------
+   # budget check
+   #-----------------------------------------------------------------------------
+   def overBudget(self):
+      """return - True if evictable entries are over the entries/bytes budget"""
+
+      return ((self.maxEntries != None and len(self.entries) > self.maxEntries) or
+              (self.maxBytes != None and self.totalBytes > self.maxBytes))
+
+
+   #-----------------------------------------------------------------------------
+   # GreedyDual-Size priority
+   #-----------------------------------------------------------------------------
+   def prioritize(self, key, wordSet):
+      """(Re)sets key's GreedyDual-Size priority: inflation + 1/size"""
+
+      priority = self.inflation + 1.0 / max(len(wordSet), 1)
+      self.priority[key] = priority
+      heapq.heappush(self.heap, (priority, key))
+
+      # every hit and put pushes, so without evictions to pop the stale ones
+      # the heap would grow forever
+      if len(self.heap) > 2 * len(self.priority):
+         self.heap = [(priority, key) for key, priority in self.priority.items()]
+         heapq.heapify(self.heap)
+
+
+   #-----------------------------------------------------------------------------
+   # GreedyDual-Size victim
+   #-----------------------------------------------------------------------------
+   def lowestPriority(self):
+      """Pops the key with the lowest GreedyDual-Size priority, and inflates
+      everyone else's by it.
+      return - the key"""
+
+      while True:
+         priority, key = heapq.heappop(self.heap)
+         if self.priority.get(key) == priority:
+            self.inflation = priority
+            return key
+
+
+   #-----------------------------------------------------------------------------
+   # dict-ish interface
+   #-----------------------------------------------------------------------------
+   def __contains__(self, key):
+      """key in WordCache"""
+      return key in self.pinned or key in self.entries
+
+   def __getitem__(self, key):
+      """WordCache[key] - like get(), but KeyError if not cached"""
+      wordSet = self.get(key)
+      if wordSet == None:
+         raise KeyError(key)
+      return wordSet
+
+   def __setitem__(self, key, wordSet):
+      """WordCache[key] = wordSet - same as put()"""
+      self.put(key, wordSet)
+
+   def __iter__(self):
+      """iterates over pinned keys, then evictable keys"""
+      return iter(list(self.pinned) + list(self.entries))
+
+   def __len__(self):
+      """number of entries, pinned and evictable"""
+      return len(self.pinned) + len(self.entries)
+
+
+   #-----------------------------------------------------------------------------
+   # print out function
+   #-----------------------------------------------------------------------------
+   def __str__(self):
+      """WordCache's representation as a string"""
+
+      return ("WordCache[" + self.policy + "; pinned=" + str(len(self.pinned)) +
+              "; entries=" + str(len(self.entries)) +
+              "; bytes=" + str(self.totalBytes) + "]")
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   from WordSet import WordSet
+
+   for policy in (WordCache.LRU, WordCache.SIZE):
+      cache = WordCache(policy, maxEntries=2)
+      cache.pin("---!", WordSet(set(["CAT", "HAT", "FAT", "TAT"])))
+      cache["-A-!"] = WordSet(set(["CAT", "HAT", "FAT"]))
+      cache["-AT!"] = WordSet(set(["CAT", "HAT"]))
+      cache.get("-A-!")
+      cache["CAT!"] = WordSet(set(["CAT"]))
+      print(cache, list(cache))
+
+# Fin
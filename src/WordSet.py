@@ -2,14 +2,34 @@
 #
 
 # Python imports
+import sys
 import collections
 
+#-------------------------------------------------------------------------------
+# Letter frequency
+#-------------------------------------------------------------------------------
+def countLetters(words):
+   """Counts the number of words each letter is in (repeated letters only count
+   once per word).
+   return - collections.Counter of letter -> number of words"""
+
+   # This list comprehension version is much faster than the below loop,
+   # at the cost of the memory used by the transient list it creates.
+   return collections.Counter([letter for sublist in map(set, words) for letter in sublist])
+
+   #letterFreq = collections.Counter()
+   #for word in words:
+   #   # update counter with word's letters (repeated letters removed)
+   #   letterFreq.update(set(word))
+
+
 #===============================================================================
 # CLASS
 #===============================================================================
 class WordSet:
    """Simple class to encapsulate a set of possible words and the letter
-   frequency assoicated with it."""
+   frequency assoicated with it. The set and the letter frequency are never
+   changed in place, only replaced, so copies can share them."""
 
    #-----------------------------------------------------------------------------
    # ctor
@@ -25,32 +45,70 @@ class WordSet:
           self.words = words.copy()
           self.updated()
 
+      # bitset of the words in their WordTable, once narrow()ed
+      self.bits = None
+
+
+   #-----------------------------------------------------------------------------
+   # game state -> words
+   #-----------------------------------------------------------------------------
+   @staticmethod
+   def match(table, pattern, wrongLetters):
+      """return - bitset of the words in WordTable table that match a game
+      state; see WordTable.match(). (Other engines, e.g. NumpyWordSet, find
+      them their own way.)"""
+
+      return table.match(pattern, wrongLetters)
+
 
    #-----------------------------------------------------------------------------
-   # shallow copy 
+   # copy on write
    #-----------------------------------------------------------------------------
    def copy(self):
-      """shallow copy of members into returned WordSet"""
+      """Copy of this WordSet, sharing its members (copy-on-write)"""
       retVal = WordSet()
-      retVal.words = self.words.copy()
-      retVal.letterFreq = self.letterFreq.copy()
+      retVal.words = self.words
+      retVal.letterFreq = self.letterFreq
+      retVal.bits = self.bits
       return retVal
 
 
+   #-----------------------------------------------------------------------------
+   # remove words
+   #-----------------------------------------------------------------------------
+   def narrow(self, table, bits, letterFreq=None):
+      """Narrows this WordSet down to the words in bitset bits of WordTable
+      table. If that's a subset of the current words, the letter frequency is
+      kept up to date by subtracting out the removed words when there are
+      fewer of them than survivors. Otherwise it's just updated().
+      letterFreq - the new words' letter frequency, if it's already known"""
+
+      words = set(table.wordsIn(bits))
+      self.bits = bits
+      if letterFreq != None:
+         self.words = words
+         self.letterFreq = letterFreq.copy()
+         return
+
+      removed = len(self.words) - len(words)
+      if 0 <= removed < len(words):
+         removed = self.words - words
+         if len(removed) + len(words) == len(self.words): # words are a subset
+            self.words = words
+            self.letterFreq = self.letterFreq - countLetters(removed) # drops 0s
+            return
+
+      self.words = words
+      self.updated()
+
+
    #-----------------------------------------------------------------------------
    # words have been updated
    #-----------------------------------------------------------------------------
    def updated(self):
       """Object's words have been updated, so redo the letter frequency count."""
 
-      # This list comprehension version is much faster than the below loop,
-      # at the cost of the memory used by the transient list it creates.
-      self.letterFreq = collections.Counter([letter for sublist in map(set,self.words) for letter in sublist])
-
-      #letterFreq = collections.Counter()
-      #for word in self.possibleWords:
-      #   # update counter with word's letters (repeated letters removed)
-      #   letterFreq.update(set(word))
+      self.letterFreq = countLetters(self.words)
 
 
    #-----------------------------------------------------------------------------
@@ -62,6 +120,16 @@ class WordSet:
       return len(self.words)
 
 
+   #-----------------------------------------------------------------------------
+   # memory used
+   #-----------------------------------------------------------------------------
+   def sizeof(self):
+      """return - approximate bytes used by this object. The word strings
+      themselves are shared with the dictionary, so they don't count."""
+
+      return sys.getsizeof(self.words) + sys.getsizeof(self.letterFreq)
+
+
    #-----------------------------------------------------------------------------
    # print out function
    #-----------------------------------------------------------------------------
@@ -84,7 +152,12 @@ if __name__ == '__main__':
    print("Not:  ", bar)
 
    baz = bar.copy()
-   baz.words.add("FAT")
+   baz.words = baz.words | set(["FAT"])
    baz.updated()
    print("2:", bar)
    print("3:", baz)
+
+   from WordTable import WordTable
+   table = WordTable(baz.words)
+   baz.narrow(table, table.match("-AT", set(["F"])))
+   print("4:", baz)
@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+#
+
+# Python imports
+import re
+import sys
+import string
+import itertools
+import collections
+from array import array
+
+# CONSTANTS
+LETTERS = string.ascii_uppercase
+
+# Bits per letter in a 'lane' mask. Each letter gets its own counter lane, so
+# summing lane masks counts all 26 letters at once. 20 bits holds counts up to
+# ~1M words, which is plenty for any one word length.
+LANE_BITS = 20
+LANE_MAX  = (1 << LANE_BITS) - 1
+
+
+# letter -> its bit in a letter mask, and its lowest bit in a lane mask
+LETTER_BITS = {letter: 1 << i for i, letter in enumerate(LETTERS)}
+LANE_ONES   = {letter: 1 << (i * LANE_BITS) for i, letter in enumerate(LETTERS)}
+
+# Count letters word by word (see WordTable.laneSum()) for sets of at most this
+# many words, else a letter at a time over the whole set.
+LANE_WORDS = 128
+
+
+# letter -> str.translate() table turning that letter into '1', others into '0'
+FLAG_TABLES = {letter: str.maketrans(LETTERS, "".join('1' if l == letter else '0'
+                                                     for l in LETTERS))
+               for letter in LETTERS}
+
+
+# bytes.translate() table turning bin()'s '0'/'1' characters into 0/1 bytes
+BIN_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
+# byte value -> the bits set in it
+BYTE_BITS = [tuple(i for i in range(8) if byte & (1 << i)) for byte in range(256)]
+
+# byte k of a letter mask -> byte value -> those letters' lane mask
+BYTE_LANES = [[sum(LANE_ONES[LETTERS[8 * k + i]] for i in BYTE_BITS[byte]
+                   if 8 * k + i < len(LETTERS))
+               for byte in range(256)]
+              for k in range(4)]
+NONZERO_BYTE = re.compile(b'[^\x00]')
+
+# Use a bitset's set bits one by one when fewer than 1 in SPARSE_RATIO are
+# set, else go over all of its bits.
+SPARSE_RATIO = 64
+
+# int.bit_count() is Python 3.10+
+popcount = getattr(int, "bit_count", None) or (lambda bits: bin(bits).count('1'))
+
+
+#-------------------------------------------------------------------------------
+# Bitset flags
+#-------------------------------------------------------------------------------
+def flags(bits):
+   """return - bytes of 1/0 for bit 0, bit 1, ... of bitset bits (up to its
+   highest set bit). For use with itertools.compress()."""
+   return bin(bits)[:1:-1].encode().translate(BIN_FLAGS)
+
+
+#-------------------------------------------------------------------------------
+# Bitset set bits
+#-------------------------------------------------------------------------------
+def setBits(bits):
+   """return - list of the positions of the set bits in bitset bits. Only
+   looks at nonzero bytes, so it's quick for sparse bitsets."""
+   data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+   positions = []
+   for match in NONZERO_BYTE.finditer(data):
+      base = match.start() * 8
+      positions.extend([base + i for i in BYTE_BITS[data[match.start()]]])
+   return positions
+
+
+#-------------------------------------------------------------------------------
+# Positions -> bitset
+#-------------------------------------------------------------------------------
+def bitsOf(positions):
+   """return - bitset with the bits at positions set, the reverse of setBits()"""
+   if not positions:
+      return 0
+   data = bytearray(max(positions) // 8 + 1)
+   for position in positions:
+      data[position >> 3] |= 1 << (position & 7)
+   return int.from_bytes(data, 'little')
+
+
+#-------------------------------------------------------------------------------
+# One word vs. a game state
+#-------------------------------------------------------------------------------
+def matches(word, pattern, wrongLetters):
+   """return - True if word matches the game state, the same as
+   WordTable.match() would find it: the pattern's revealed letters where they
+   are, and none of the wrong letters"""
+   if len(word) != len(pattern):
+      return False
+   for letter, shown in zip(word, pattern):
+      if shown in LETTER_BITS and shown != letter:
+         return False
+   return not set(wrongLetters).intersection(word)
+
+
+#-------------------------------------------------------------------------------
+# Letter-presence mask
+#-------------------------------------------------------------------------------
+def letterMask(word):
+   """Returns the 26-bit letter-presence mask of word. Bit 0 is 'A', bit 25 is
+   'Z'. Repeated letters only set their bit once."""
+   return sum(map(LETTER_BITS.__getitem__, set(word)))
+
+
+#-------------------------------------------------------------------------------
+# Letter-presence mask, spread out into counter lanes
+#-------------------------------------------------------------------------------
+def laneMask(word):
+   """Like letterMask(), but each letter's bit sits at the bottom of its own
+   LANE_BITS wide lane. sum() of lane masks is then all 26 letter counts in
+   one (big) int."""
+   return sum(map(LANE_ONES.__getitem__, set(word)))
+
+
+#-------------------------------------------------------------------------------
+# Unpack lanes
+#-------------------------------------------------------------------------------
+def laneCounts(total):
+   """Unpacks a sum of lane masks into a letter count.
+   return - collections.Counter of letter -> count, without any 0 counts"""
+   letterFreq = collections.Counter()
+   for i, letter in enumerate(LETTERS):
+      count = (total >> (i * LANE_BITS)) & LANE_MAX
+      if count:
+         letterFreq[letter] = count
+   return letterFreq
+
+
+#-------------------------------------------------------------------------------
+# Pack lanes
+#-------------------------------------------------------------------------------
+def laneTotal(letterFreq):
+   """Packs a letter count into lanes, the reverse of laneCounts().
+   return - all 26 letter counts, packed into one int"""
+   return sum(letterFreq[letter] << (i * LANE_BITS)
+              for i, letter in enumerate(LETTERS))
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class WordList:
+   """Read-only list of the words packed back to back in a bytes, all the same
+   length. A word's str is only made when it's asked for, by slicing a
+   memoryview of the bytes."""
+
+   __slots__ = ("view", "length")
+
+   def __init__(self, data, length):
+      self.view = memoryview(data)
+      self.length = length
+
+   def __len__(self):
+      return len(self.view) // self.length if self.length else 0
+
+   def __getitem__(self, i):
+      if i < 0:
+         i += len(self)
+      if not 0 <= i < len(self):
+         raise IndexError("word id out of range")
+      start = i * self.length
+      return str(self.view[start:start + self.length], 'ascii')
+
+   def __iter__(self):
+      return map(self.__getitem__, range(len(self)))
+
+
+#===============================================================================
+# CLASS
+#===============================================================================
+class WordTable:
+   """Table of dictionary words, all the same length. Words are referred to by
+   their index (id) in the table, so sets of words can be just arrays of ids,
+   or bitsets with bit i set for word i. Ids never change: added words go on
+   the end, and removed ones just leave a gap (see add() and remove()).
+
+   The words are stored as one bytes of all of them back to back (fixed
+   stride), not as a str each; see WordList.
+
+   The table has a positional inverted index of bitsets built once up front, so
+   narrowing down to the words that match a game state is a few bitwise
+   AND/ANDNOTs instead of a loop over the words."""
+
+   #-----------------------------------------------------------------------------
+   # ctor
+   #-----------------------------------------------------------------------------
+   def __init__(self, words=(), positionBits=None, length=None):
+      """Initialize WordTable with provided words. Words are sorted, so a word's
+      id is stable for the same dictionary.
+      positionBits - the index, if it was built already (e.g. loaded from a
+      DictionarySnapshot), in which case words must already be sorted
+      length - the words' length, if words is a bytes (or memoryview, e.g.
+      into a DictionarySnapshot, which is then used in place) of them back to
+      back instead, already sorted"""
+
+      if length == None:
+         words = sorted(words)
+         length = len(words[0]) if words else 0
+         words = "".join(words).encode('ascii')
+      self.data = words
+      self.length = length
+
+      # the words, as strs when they're needed
+      self.words = WordList(self.data, self.length)
+
+      # bitset of every word in the table
+      self.everything = (1 << len(self.words)) - 1
+
+      # letter-presence mask per word. Only needed for counting the letters of
+      # small sets word by word, so built on first use.
+      self.masks = None
+
+      # position -> {letter -> bitset of words with letter at position}
+      self.positionBits = positionBits
+      if self.positionBits == None:
+         self.buildIndex()
+
+      # letter -> bitset of words with letter anywhere
+      self.letterBits = collections.Counter()
+      for bits in self.positionBits:
+         for letter in bits:
+            self.letterBits[letter] |= bits[letter]
+
+      # True once words have been added or removed, so the words aren't all
+      # sorted, or all in the table, any more
+      self.edited = False
+
+
+   #-----------------------------------------------------------------------------
+   # inverted index
+   #-----------------------------------------------------------------------------
+   def buildIndex(self):
+      """Builds the (position, letter) -> bitset index."""
+
+      self.positionBits = []
+
+      # Every word is the same length, so one string of all of them sliced
+      # with a stride is one position's letters for every word, in id order.
+      allWords = str(self.data, 'ascii')
+      for position in range(self.length):
+         column = allWords[position::self.length]
+         bits = {}
+         for letter in set(column):
+            # '1' for the words with letter here; reversed so word 0 is bit 0
+            bits[letter] = int(column.translate(FLAG_TABLES[letter])[::-1], 2)
+         self.positionBits.append(bits)
+
+
+   #-----------------------------------------------------------------------------
+   # game state -> words
+   #-----------------------------------------------------------------------------
+   def match(self, pattern, wrongLetters):
+      """Finds the words that could be the secret word, given the guessed-so-far
+      pattern (e.g. 'F-CTU-L') and the incorrectly guessed letters.
+      Like the old regex, unknown letters only exclude the wrong letters, not
+      the letters already revealed elsewhere.
+      return - bitset of the matching words' ids"""
+
+      if len(pattern) != self.length:
+         return 0
+
+      bits = self.everything
+      for position, letter in enumerate(pattern):
+         if letter in LETTER_BITS: # i.e. not a mystery letter
+            bits &= self.positionBits[position].get(letter, 0)
+      for letter in wrongLetters:
+         bits &= ~self.letterBits[letter]
+      return bits
+
+
+   #-----------------------------------------------------------------------------
+   # game state -> words, from an earlier state's words
+   #-----------------------------------------------------------------------------
+   def matchSince(self, bits, fromPattern, fromWrongLetters, pattern,
+                  wrongLetters):
+      """Same as match(), but from bits, the words that match an earlier state
+      of the game (fromPattern, fromWrongLetters), so only what's been found
+      out since has to be applied: the newly revealed positions are ANDed in,
+      and the newly wrong letters ANDNOTed out.
+      return - bitset of the matching words' ids, or None if the earlier state
+      isn't one the game could have been in on the way to this one"""
+
+      if len(fromPattern) != len(pattern) or len(pattern) != self.length or \
+         not set(fromWrongLetters).issubset(wrongLetters):
+         return None
+
+      for position, letter in enumerate(pattern):
+         if fromPattern[position] != letter:
+            if fromPattern[position] in LETTER_BITS or letter not in LETTER_BITS:
+               return None # different letter there, or hidden again
+            bits &= self.positionBits[position].get(letter, 0)
+      for letter in wrongLetters:
+         if letter not in fromWrongLetters:
+            bits &= ~self.letterBits[letter]
+      return bits
+
+
+   #-----------------------------------------------------------------------------
+   # word -> id
+   #-----------------------------------------------------------------------------
+   def find(self, word):
+      """return - word's id, or None if it's not in the table (or isn't an A-Z
+      word, e.g. a pattern, which match() would take '-'s in as wildcards)"""
+
+      if not set(word).issubset(LETTER_BITS):
+         return None
+      bits = self.match(word, ())
+      return bits.bit_length() - 1 if bits else None
+
+
+   #-----------------------------------------------------------------------------
+   # add a word
+   #-----------------------------------------------------------------------------
+   def add(self, word):
+      """Adds word to the end of the table, and to its index, unless it's in
+      already. Copies the words' bytes, so it's for the odd word, not lots.
+      return - word's new id, or None if it was in already
+      exception - ValueError if word isn't A-Z, or isn't the table's length"""
+
+      if not word or not set(word).issubset(LETTER_BITS):
+         raise ValueError("%r is not an A-Z word" % word)
+      if not len(self.words): # e.g. a length the dictionary didn't have
+         self.length = len(word)
+         self.positionBits = [{} for _ in range(self.length)]
+      if len(word) != self.length:
+         raise ValueError("%r is not %d letters long" % (word, self.length))
+      if self.find(word) != None:
+         return None
+
+      wordId = len(self.words)
+      bit = 1 << wordId
+      self.data = bytes(self.data) + word.encode('ascii')
+      self.words = WordList(self.data, self.length)
+      self.everything |= bit
+      for position, letter in enumerate(word):
+         bits = self.positionBits[position]
+         bits[letter] = bits.get(letter, 0) | bit
+         self.letterBits[letter] |= bit
+      if self.masks != None:
+         self.masks.append(letterMask(word))
+      self.edited = True
+      return wordId
+
+
+   #-----------------------------------------------------------------------------
+   # remove a word
+   #-----------------------------------------------------------------------------
+   def remove(self, word):
+      """Takes word out of the table's index, so nothing matches it any more.
+      Its id isn't reused.
+      return - word's id, or None if it wasn't in the table"""
+
+      wordId = self.find(word) if len(word) == self.length else None
+      if wordId == None:
+         return None
+
+      # it's in the table, so its letters are in every index below; nothing
+      # can fail part way through clearing them
+      bit = 1 << wordId
+      self.everything &= ~bit
+      for position, letter in enumerate(word):
+         self.positionBits[position][letter] &= ~bit
+         self.letterBits[letter] &= ~bit
+      self.edited = True
+      return wordId
+
+
+   #-----------------------------------------------------------------------------
+   # bitset -> ids
+   #-----------------------------------------------------------------------------
+   def ids(self, bits):
+      """return - list of the ids of the words in bitset bits, in order"""
+
+      if popcount(bits) * SPARSE_RATIO < len(self.words):
+         return setBits(bits)
+      return list(itertools.compress(range(len(self.words)), flags(bits)))
+
+
+   #-----------------------------------------------------------------------------
+   # bitset -> words
+   #-----------------------------------------------------------------------------
+   def wordsIn(self, bits):
+      """return - list of the words in bitset bits, in order"""
+
+      return list(map(self.words.__getitem__, self.ids(bits)))
+
+
+   #-----------------------------------------------------------------------------
+   # count letters
+   #-----------------------------------------------------------------------------
+   def letterFreq(self, bits):
+      """Counts the number of words in bitset bits each letter is in.
+      return - collections.Counter of letter -> number of words"""
+
+      return laneCounts(self.laneSum(bits))
+
+
+   #-----------------------------------------------------------------------------
+   # count letters, in lanes
+   #-----------------------------------------------------------------------------
+   def laneSum(self, words):
+      """Sums the lane masks of words (a bitset of them, or a list/array of
+      their ids). See laneCounts(). For a few words, that's spreading each
+      one's letter mask into lanes and adding them up. Otherwise it's quicker
+      to count a letter at a time, how many of the words the index says have it.
+      return - all 26 letter counts, packed into one int"""
+
+      if isinstance(words, int):
+         bits, ids = words, None
+         count = popcount(bits)
+      else:
+         bits, ids = None, words
+         count = len(ids)
+
+      if count > LANE_WORDS:
+         if bits == None:
+            bits = bitsOf(ids)
+         letterBits = self.letterBits
+         return sum(popcount(bits & letterBits[letter]) << (i * LANE_BITS)
+                    for i, letter in enumerate(LETTERS) if letter in letterBits)
+
+      if self.masks == None:
+         self.masks = array('L', map(letterMask, self.words))
+      lanes0, lanes1, lanes2, lanes3 = BYTE_LANES
+      total = 0
+      if ids == None:
+         ids = setBits(bits)
+      for mask in map(self.masks.__getitem__, ids):
+         total += (lanes0[mask & 0xFF] + lanes1[mask >> 8 & 0xFF] +
+                   lanes2[mask >> 16 & 0xFF] + lanes3[mask >> 24])
+      return total
+
+
+   #-----------------------------------------------------------------------------
+   # len(WordTable)
+   #-----------------------------------------------------------------------------
+   def __len__(self):
+      """WordTable's length is the number of words in it."""
+
+      return len(self.words)
+
+
+   #-----------------------------------------------------------------------------
+   # memory used
+   #-----------------------------------------------------------------------------
+   def sizeof(self):
+      """return - approximate bytes used by this table: its words, index, and
+      letter masks"""
+
+      retVal = sys.getsizeof(self.data) + sys.getsizeof(self.everything)
+      for bits in self.positionBits:
+         retVal += sum(map(sys.getsizeof, bits.values()))
+      retVal += sum(map(sys.getsizeof, self.letterBits.values()))
+      if self.masks != None:
+         retVal += sys.getsizeof(self.masks)
+      return retVal
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   table = WordTable(["HAT", "CAT", "TAT"])
+   print(table.letterFreq(table.everything))
+   print(list(table.words), [bin(mask) for mask in table.masks])
+   print(table.letterFreq(0b101))
+   print(table.wordsIn(table.match("-AT", set())))
+   print(table.wordsIn(table.match("-AT", set(["H"]))))
+   print(table.wordsIn(table.match("TA-", set(["H"]))))
+   print(table.wordsIn(table.matchSince(table.match("-A-", set(["H"])),
+                                        "-A-", set(["H"]), "TA-", set(["H"]))))
+   table.add("BAT")
+   table.remove("CAT")
+   print(table.wordsIn(table.match("-AT", set(["H"]))), table.find("BAT"),
+         matches("BAT", "-AT", set(["H"])))
+
+# Fin
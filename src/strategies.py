@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+#
+
+# local imports
+if not __package__:
+   # Run as main, or imported by another src module that is, for quick testing.
+   from FrequencyStrategy import FrequencyStrategy
+   from EntropyStrategy import EntropyStrategy
+else:
+   from src.FrequencyStrategy import FrequencyStrategy
+   from src.EntropyStrategy import EntropyStrategy
+
+#-------------------------------------------------------------------------------
+# Registry
+#-------------------------------------------------------------------------------
+
+# name -> (strategy class, {class constant -> value to use instead})
+STRATEGIES = {}
+
+def register(name, strategyType, **settings):
+   """Adds a strategy to the registry under name: strategyType (a
+   FrequencyStrategy or subclass) with its class constants (e.g. SEED_MIN)
+   overridden by settings."""
+
+   STRATEGIES[name] = (strategyType, settings)
+
+register("frequency", FrequencyStrategy)
+register("frequency-a-z", FrequencyStrategy, TIES="a-z")
+register("frequency-seed-100", FrequencyStrategy, SEED_MIN=100)
+register("entropy", EntropyStrategy)
+register("entropy-miss-1", EntropyStrategy, MISS_COST=1.0)
+
+
+#-------------------------------------------------------------------------------
+# Make one
+#-------------------------------------------------------------------------------
+def create(name, filepath, *args, **kwargs):
+   """return - new strategy registered as name. The rest of the arguments are
+   the strategy class's, e.g. the dictionary file (or base=, to share another
+   strategy's dictionary).
+   exception - ValueError if there isn't one called name"""
+
+   if name not in STRATEGIES:
+      raise ValueError("no strategy called %r (there's %s)" %
+                       (name, ", ".join(sorted(STRATEGIES))))
+
+   strategyType, settings = STRATEGIES[name]
+   if settings:
+      # a subclass, so the settings are in place before the ctor (or anything
+      # else) uses them
+      strategyType = type(strategyType.__name__, (strategyType,), settings)
+   return strategyType(filepath, *args, **kwargs)
+
+
+
+#===============================================================================
+#-------------------------------------------------------------------------------
+#                                The Main Event
+#-------------------------------------------------------------------------------
+#===============================================================================
+if __name__ == '__main__':
+   from HangmanGame import HangmanGame
+
+   base = create("frequency", "../data/words.txt")
+   for name in sorted(STRATEGIES):
+      strategy = create(name, base.filepath, base=base)
+      game = HangmanGame("FACTUAL", 5)
+      print(name, strategy.nextGuess(game))
+   print(base.tables.keys())
+
+# Fin
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 import time
-import os
+import re
 
 #-------------------------------------------------------------------------------
 # Prints stuff
@@ -28,6 +28,20 @@ def pretty_size(num):
       num /= 1024.0
 
 
+#-------------------------------------------------------------------------------
+# Parse human file size
+#-------------------------------------------------------------------------------
+def parse_size(text):
+   """Returns the bytes in a human-written size, the reverse of pretty_size().
+   E.g. '2048' -> 2048, '2K' or '2 KiB' -> 2048, '1.5M' -> 1572864
+   exception - ValueError if text isn't a size"""
+   match = re.match(r"\s*([0-9.]+)\s*([KMGTPEZY]?)(I?B|BYTES)?\s*$", text.upper())
+   if match == None:
+      raise ValueError("not a size: %r" % text)
+   number, unit, _ = match.groups()
+   return int(float(number) * 1024 ** " KMGTPEZY".index(unit or " "))
+
+
 #===============================================================================
 # http://preshing.com/20110924/timing-your-code-using-pythons-with-statement
 #===============================================================================
@@ -49,14 +63,9 @@ class Timer:
        self.interval = self.end - self.start
 
    def getTime(self):
-      """Uses most accurate clock, based on platform. See:
+      """Uses most accurate clock, on every platform. See:
       http://docs.python.org/library/timeit.html#timeit.default_timer"""
-      if os.name == 'nt':
-         # clock() has best accuracy on Windows
-         return time.clock()
-      else:
-         # time() has best accuracy on Unix
-         return time.time()
+      return time.perf_counter()
       
 
 #===============================================================================